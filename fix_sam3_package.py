@@ -6,102 +6,228 @@ This script fixes the incomplete SAM3 package installation by copying
 missing submodules that aren't included in the package configuration.
 """
 
+import concurrent.futures
 import os
 import shutil
+import subprocess
 import sys
 from pathlib import Path
 
+# Lookup results keyed by the script directory; the filesystem layout does
+# not change while the script runs, so probing once is enough.
+_SOURCE_CACHE = {}
+_INSTALL_CACHE = {}
+
+
+def _list_entries(parent):
+    """Return the entry names of ``parent`` with a single scandir pass."""
+    try:
+        with os.scandir(parent) as it:
+            return {entry.name for entry in it}
+    except OSError:
+        return set()
+
+
 def find_sam3_source():
     """Find the SAM3 source directory."""
+    script_dir = os.path.dirname(__file__)
+    if script_dir in _SOURCE_CACHE:
+        return _SOURCE_CACHE[script_dir]
+
     # Check common locations
     locations = [
         "/tmp/sam3",
         os.path.expanduser("~/sam3"),
-        os.path.join(os.path.dirname(__file__), "sam3"),
+        os.path.join(script_dir, "sam3"),
     ]
-    
+
+    source = None
     for loc in locations:
-        if os.path.exists(os.path.join(loc, "sam3", "__init__.py")):
-            return loc
-    
-    # Try to find it in the git cache
-    try:
-        import subprocess
-        result = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=os.path.dirname(__file__),
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            git_root = result.stdout.strip()
-            sam3_path = os.path.join(git_root, "sam3")
-            if os.path.exists(sam3_path):
-                return git_root
-    except:
-        pass
-    
-    return None
+        if "sam3" in _list_entries(loc) and "__init__.py" in _list_entries(
+            os.path.join(loc, "sam3")
+        ):
+            source = loc
+            break
+
+    if source is None:
+        # Try to find it in the git cache
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "--show-toplevel"],
+                cwd=script_dir,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode == 0:
+                git_root = result.stdout.strip()
+                if "sam3" in _list_entries(git_root):
+                    source = git_root
+        except:
+            pass
+
+    _SOURCE_CACHE[script_dir] = source
+    return source
 
 def find_sam3_installed():
     """Find the installed SAM3 package location."""
+    script_dir = os.path.dirname(__file__)
+    if script_dir in _INSTALL_CACHE:
+        return _INSTALL_CACHE[script_dir]
+
     import site
-    for site_packages in site.getsitepackages():
-        sam3_path = os.path.join(site_packages, "sam3")
-        if os.path.exists(sam3_path):
-            return sam3_path
-    
     # Also check in virtual environment
-    venv_path = os.path.join(os.path.dirname(__file__), ".venv", "lib", "python3.9", "site-packages", "sam3")
-    if os.path.exists(venv_path):
-        return venv_path
-    
-    return None
+    parents = site.getsitepackages() + [
+        os.path.join(script_dir, ".venv", "lib", "python3.9", "site-packages"),
+    ]
+
+    installed = None
+    for site_packages in dict.fromkeys(parents):
+        if "sam3" in _list_entries(site_packages):
+            installed = os.path.join(site_packages, "sam3")
+            break
+
+    _INSTALL_CACHE[script_dir] = installed
+    return installed
+
+def _copyfile(src, dst):
+    """Copy file contents in-kernel where the platform allows it.
+
+    Linux uses ``os.sendfile`` and Windows uses ``CopyFileW`` so the bytes
+    never pass through a userspace buffer; other platforms (including macOS,
+    where ``shutil.copyfile`` already uses ``fcopyfile``) go through shutil.
+    """
+    if sys.platform.startswith("linux"):
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            size = os.fstat(fsrc.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                pass
+        shutil.copyfile(src, dst)
+    elif sys.platform == "win32":
+        import ctypes
+        if not ctypes.windll.kernel32.CopyFileW(src, dst, False):
+            shutil.copyfile(src, dst)
+    else:
+        shutil.copyfile(src, dst)
+
+def _scandir_copytree(src, dst):
+    """Recursively copy ``src`` into ``dst``, reusing cached scandir stats.
+
+    Equivalent to ``shutil.copytree(src, dst, symlinks=True,
+    dirs_exist_ok=True)``, but each entry's type comes from the ``DirEntry``
+    returned by ``os.scandir`` instead of fresh ``stat()`` calls.
+    """
+    os.makedirs(dst, exist_ok=True)
+    with os.scandir(src) as it:
+        entries = list(it)
+    for entry in entries:
+        target = os.path.join(dst, entry.name)
+        if entry.is_symlink():
+            if os.path.lexists(target):
+                os.remove(target)
+            os.symlink(os.readlink(entry.path), target)
+        elif entry.is_dir(follow_symlinks=False):
+            _scandir_copytree(entry.path, target)
+        else:
+            _copyfile(entry.path, target)
+            shutil.copystat(entry.path, target)
+    shutil.copystat(src, dst)
+
+def _fast_copytree(src, dst):
+    """Copy ``src`` into ``dst`` using the platform's native bulk copier.
+
+    ``shutil.copytree`` issues several syscalls per file from Python, which is
+    slow for the many small files in the SAM3 tree. robocopy (Windows) and
+    ``cp -a`` (POSIX) do the same work natively; ``_scandir_copytree`` is only
+    used when neither is available or the native tool fails.
+    """
+    if sys.platform == "win32" and shutil.which("robocopy"):
+        result = subprocess.run(
+            ["robocopy", src, dst, "/MT:64", "/E", "/NFL", "/NDL", "/NJH", "/NJS"],
+            check=False,
+        )
+        # robocopy exit codes below 8 mean success (0: nothing to copy,
+        # 1: files copied, 2-7: extra/mismatched files were reported)
+        if result.returncode < 8:
+            return
+    elif sys.platform != "win32" and shutil.which("cp"):
+        os.makedirs(dst, exist_ok=True)
+        result = subprocess.run(["cp", "-a", os.path.join(src, "."), dst], check=False)
+        if result.returncode == 0:
+            return
+
+    _scandir_copytree(src, dst)
+
+def _copy_all(tasks):
+    """Run ``(source, target, label)`` copy tasks concurrently.
+
+    The copies are independent and I/O-bound, so overlapping them keeps the
+    disk busy instead of waiting on one tree at a time. Returns the labels
+    that were copied successfully.
+    """
+    if not tasks:
+        return []
+
+    succeeded = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(tasks))) as ex:
+        futures = {
+            ex.submit(_fast_copytree, source, target): label
+            for source, target, label in tasks
+        }
+        for future in concurrent.futures.as_completed(futures):
+            label = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠ Failed to copy {label}: {e}")
+            else:
+                succeeded.append(label)
+                print(f"✓ Copied {label}")
+    return succeeded
 
 def copy_missing_modules(source_dir, target_dir):
     """Copy missing SAM3 modules from source to installed location."""
     modules_to_copy = ["sam", "train", "perflib", "eval", "agent"]
+    tasks = []
     
     # Also copy model/utils subdirectory
     model_utils_source = os.path.join(source_dir, "sam3", "model", "utils")
     model_utils_target = os.path.join(target_dir, "model", "utils")
     if os.path.exists(model_utils_source):
-        try:
-            shutil.copytree(model_utils_source, model_utils_target, dirs_exist_ok=True)
-            print(f"✓ Copied model/utils module")
-        except Exception as e:
-            print(f"⚠ Failed to copy model/utils: {e}")
+        tasks.append((model_utils_source, model_utils_target, "model/utils module"))
     
     # Copy assets directory
     assets_source = os.path.join(source_dir, "assets")
     assets_target = os.path.join(os.path.dirname(target_dir), "assets")
     if os.path.exists(assets_source):
-        try:
-            shutil.copytree(assets_source, assets_target, dirs_exist_ok=True)
-            print(f"✓ Copied assets directory")
-        except Exception as e:
-            print(f"⚠ Failed to copy assets: {e}")
+        tasks.append((assets_source, assets_target, "assets directory"))
     
     source_sam3 = os.path.join(source_dir, "sam3")
     if not os.path.exists(source_sam3):
+        _copy_all(tasks)
         print(f"Error: Source sam3 directory not found at {source_sam3}")
         return False
     
-    copied = []
+    module_labels = set()
     for module in modules_to_copy:
         source_module = os.path.join(source_sam3, module)
         target_module = os.path.join(target_dir, module)
         
         if os.path.exists(source_module) and not os.path.exists(target_module):
-            try:
-                shutil.copytree(source_module, target_module, dirs_exist_ok=True)
-                copied.append(module)
-                print(f"✓ Copied {module} module")
-            except Exception as e:
-                print(f"⚠ Failed to copy {module}: {e}")
+            label = f"{module} module"
+            tasks.append((source_module, target_module, label))
+            module_labels.add(label)
         elif os.path.exists(target_module):
             print(f"⊘ {module} already exists")
     
+    copied = [label for label in _copy_all(tasks) if label in module_labels]
     return len(copied) > 0
 
 def main():
@@ -6,9 +6,9 @@ from loguru import logger
 
 
 def _get_contour_length(contour: npt.NDArray[np.float32]) -> float:
-    contour_start: npt.NDArray[np.float32] = contour
-    contour_end: npt.NDArray[np.float32] = np.r_[contour[1:], contour[0:1]]
-    return np.linalg.norm(contour_end - contour_start, axis=1).sum()
+    # Closed-loop segment vectors, including the last point back to the first
+    segments: npt.NDArray[np.float32] = np.diff(contour, axis=0, append=contour[:1])
+    return np.hypot(segments[:, 0], segments[:, 1]).sum()
 
 
 def compute_polygon_from_mask(mask: npt.NDArray[np.bool_]) -> npt.NDArray[np.float32]:
@@ -7,7 +7,12 @@ allowing SAM3 to be used directly in labelme without waiting for osam to support
 
 from __future__ import annotations
 
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
 import os
+import threading
 from typing import Any, Literal, Optional
 
 import numpy as np
@@ -24,6 +29,17 @@ except ImportError:
     logger.warning("SAM3 not available. Install with: pip install git+https://github.com/facebookresearch/sam3.git")
 
 
+_SAM3_PREFIX = "sam3:"
+
+# Model name tag -> variant; unknown tags fall back to latest/medium
+_VARIANTS = {
+    "small": "small",
+    "large": "large",
+    "latest": "latest",
+    "medium": "latest",
+}
+
+
 # Mock osam types for compatibility
 class BoundingBox:
     """Bounding box compatible with osam.types.BoundingBox."""
@@ -50,17 +66,99 @@ class GenerateResponse:
 
 class ImageEmbedding:
     """Image embedding wrapper for SAM3."""
+
+    # Predictor attributes written by set_image; snapshotting them lets a
+    # cached embedding be re-activated on the shared predictor later
+    _STATE_ATTRS = ("_features", "_orig_hw", "_is_image_set", "_is_batch")
+
     def __init__(self, predictor: SAM3InteractiveImagePredictor, image: np.ndarray):
         self.predictor = predictor
         self.image = image
         # Set image in predictor (this encodes the image)
         self.predictor.set_image(image)
+        self._state = {
+            attr: getattr(predictor, attr)
+            for attr in self._STATE_ATTRS
+            if hasattr(predictor, attr)
+        }
+
+    def activate(self) -> None:
+        """Restore this image's features on the shared predictor."""
+        for attr, value in self._state.items():
+            setattr(self.predictor, attr, value)
+
+
+class _LazyImageEmbedding:
+    """ImageEmbedding whose encoding runs on SAM3Model's worker thread.
+
+    Attribute access blocks until the encoding has finished, so callers can
+    treat it as a regular ImageEmbedding.
+    """
+
+    def __init__(self, future: concurrent.futures.Future):
+        self._future = future
+
+    def result(self) -> ImageEmbedding:
+        return self._future.result()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._future.result(), name)
+
+
+def _resolve_embedding(
+    image_embedding: ImageEmbedding | _LazyImageEmbedding,
+) -> ImageEmbedding:
+    if isinstance(image_embedding, _LazyImageEmbedding):
+        return image_embedding.result()
+    return image_embedding
+
+
+class _CompiledWithFallback(torch.nn.Module):
+    """Run a torch.compile'd module, switching back to eager if compiling fails.
+
+    torch.compile only wraps the module; Dynamo/Inductor errors are raised by
+    the first call, which for the image encoder happens on the encode worker
+    thread. A failing compiled call is re-run on the eager module, which is
+    used from then on.
+    """
+
+    def __init__(self, eager: torch.nn.Module, compiled: Any, name: str):
+        super().__init__()
+        self.eager = eager
+        # Kept out of the submodules so the weights are registered only once
+        self.__dict__["_compiled"] = compiled
+        self.__dict__["_name"] = name
+
+    def forward(self, *args: Any, **kwargs: Any) -> Any:
+        compiled = self.__dict__["_compiled"]
+        if compiled is not None:
+            try:
+                return compiled(*args, **kwargs)
+            except Exception as e:
+                logger.warning(
+                    f"torch.compile of SAM3 {self._name} failed, "
+                    f"running eagerly: {e}"
+                )
+                self.__dict__["_compiled"] = None
+        return self.eager(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # The tracker also reads attributes and calls methods of its encoder
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            if name == "eager":
+                raise
+            return getattr(self.eager, name)
 
 
 class SAM3Model:
     """
     SAM3 model adapter that implements the osam.types.Model interface.
     """
+
+    _EMBED_CACHE_SIZE = 4
+    _POINT_BUFFER_SIZE = 32
     
     def __init__(self, model_name: str, device: Optional[str] = None):
         """
@@ -73,12 +171,8 @@ class SAM3Model:
         self.name = model_name
         
         # Determine model variant
-        if ":small" in model_name:
-            variant = "small"
-        elif ":large" in model_name:
-            variant = "large"
-        else:  # default to latest/medium
-            variant = "latest"
+        _, _, tag = model_name.partition(":")
+        variant = _VARIANTS.get(tag, "latest")
         
         # Set device
         if device is None:
@@ -120,54 +214,183 @@ class SAM3Model:
                 pass
             self.predictor = SAM3InteractiveImagePredictor(tracker)
             logger.info("Created SAM3InteractiveImagePredictor with backbone")
-            
+
+            # Inference only: freeze weights so autograd never tracks them
+            for module in (self.model, tracker):
+                module.eval()
+                for p in module.parameters():
+                    p.requires_grad_(False)
+
+            if device == "cuda":
+                self._compile_image_encoder(tracker)
+
             logger.info(f"SAM3 model {variant} loaded successfully on {device}")
         except Exception as e:
             logger.error(f"Failed to load SAM3 model: {e}")
             raise
+
+        # Recently encoded images keyed by content hash, so repeated prompts
+        # on the same image skip the image encoder
+        self._embed_cache: collections.OrderedDict[bytes, _LazyImageEmbedding] = (
+            collections.OrderedDict()
+        )
+        self._active_embedding: ImageEmbedding | None = None
+
+        # Image encoding runs on a single worker thread so the UI thread is
+        # not blocked; the lock serializes access to the stateful predictor
+        self._exec = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sam3-encode"
+        )
+        self._lock = threading.Lock()
+        # Guards _embed_cache, which the worker thread's done-callbacks also
+        # modify; separate from _lock so lookups never wait on an encoding
+        self._cache_lock = threading.Lock()
+
+        # Pinned host staging buffers for point prompts, reused across clicks
+        # so the host-to-device copy can run asynchronously on CUDA
+        self._pts_host: torch.Tensor | None = None
+        self._lbl_host: torch.Tensor | None = None
+        if self.device == "cuda":
+            self._alloc_point_buffers(self._POINT_BUFFER_SIZE)
+
+    @staticmethod
+    def _compile_image_encoder(tracker: Any) -> None:
+        """Compile the image encoder for the fixed input size with torch.compile.
+
+        The encoder always sees image_size x image_size inputs, so a static
+        graph is specialized once and reused. The default mode is used rather
+        than "reduce-overhead": CUDA graph replays overwrite their output
+        buffers on the next call, while ImageEmbedding snapshots and the
+        embedding cache keep the encoder outputs across images. Older torch
+        builds without torch.compile run eagerly, and so do encoders whose
+        compilation fails on first use (see _CompiledWithFallback).
+        """
+        if not hasattr(torch, "compile"):
+            return
+        for attr in ("image_encoder", "backbone"):
+            encoder = getattr(tracker, attr, None)
+            if encoder is None:
+                continue
+            try:
+                compiled = torch.compile(encoder, dynamic=False, fullgraph=False)
+            except Exception as e:
+                logger.warning(
+                    f"torch.compile of SAM3 {attr} failed, running eagerly: {e}"
+                )
+                return
+            setattr(tracker, attr, _CompiledWithFallback(encoder, compiled, attr))
+            logger.info(f"Compiled SAM3 {attr} with torch.compile")
+            return
+
+    def _alloc_point_buffers(self, size: int) -> None:
+        self._pts_host = torch.empty(size, 2, dtype=torch.float32, pin_memory=True)
+        self._lbl_host = torch.empty(size, dtype=torch.int32, pin_memory=True)
+
+    def _points_to_device(
+        self, points: np.ndarray, labels: np.ndarray
+    ) -> tuple[Any, Any]:
+        """Stage prompts through the pinned buffers onto the GPU.
+
+        On CPU the NumPy arrays are returned unchanged; the predictor converts
+        them itself.
+        """
+        if self._pts_host is None or self._lbl_host is None:
+            return points, labels
+        n = len(points)
+        if n > len(self._pts_host):
+            self._alloc_point_buffers(max(n, 2 * len(self._pts_host)))
+            assert self._pts_host is not None and self._lbl_host is not None
+        self._pts_host[:n].copy_(torch.from_numpy(np.asarray(points, dtype=np.float32)))
+        self._lbl_host[:n].copy_(torch.from_numpy(labels))
+        return (
+            self._pts_host[:n].to(self.device, non_blocking=True),
+            self._lbl_host[:n].to(self.device, non_blocking=True),
+        )
+
+    def _inference_context(self) -> contextlib.ExitStack:
+        """Context for predictor calls: no autograd, and bf16/fp16 on CUDA."""
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.device == "cuda":
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            stack.enter_context(torch.autocast(device_type="cuda", dtype=dtype))
+        return stack
     
-    def encode_image(self, image: np.ndarray) -> ImageEmbedding:
+    def encode_image(self, image: np.ndarray) -> _LazyImageEmbedding:
         """
         Encode image and return embedding.
         
+        The encoder runs in the background; the returned embedding blocks on
+        first use until it is ready.
+        
         Args:
             image: RGB image as numpy array (H, W, 3)
             
         Returns:
-            ImageEmbedding object
+            _LazyImageEmbedding resolving to the ImageEmbedding
         """
         # Convert to RGB if needed
         if image.dtype != np.uint8:
-            image = (image * 255).astype(np.uint8)
+            # Write the scaled values straight into the uint8 output; the
+            # ufunc casts in small buffered chunks instead of materialising a
+            # full-size float intermediate
+            scaled = np.empty(image.shape, dtype=np.uint8)
+            np.multiply(image, 255, out=scaled, casting="unsafe")
+            image = scaled
         
+        # Hash before the grayscale expansion below so the key never forces
+        # a contiguous copy of the broadcast RGB view
+        image = np.ascontiguousarray(image)
+        hasher = hashlib.blake2b(f"{image.shape}{image.dtype}".encode(), digest_size=16)
+        hasher.update(image.data)
+        key = hasher.digest()
+        with self._cache_lock:
+            cached = self._embed_cache.get(key)
+            if cached is not None:
+                self._embed_cache.move_to_end(key)
+                return cached
+
         # Ensure RGB format
         if len(image.shape) == 3 and image.shape[2] == 3:
             pass  # Already RGB
         elif len(image.shape) == 2:
-            # Grayscale to RGB
-            image = np.stack([image] * 3, axis=-1)
+            # Grayscale to RGB as a zero-copy view; the predictor's transforms
+            # copy it into a contiguous tensor anyway
+            image = np.broadcast_to(image[..., None], (*image.shape, 3))
         else:
             raise ValueError(f"Unsupported image shape: {image.shape}")
-        
-        # Use the model's interactive predictor (already created)
-        # The predictor is shared, so we need to reset it for each new image
-        self.predictor.reset_predictor()
-        return ImageEmbedding(self.predictor, image)
+
+        future = self._exec.submit(self._encode_sync, image)
+        embedding = _LazyImageEmbedding(future)
+
+        def drop_failed(f: concurrent.futures.Future) -> None:
+            # Don't keep serving an embedding whose encoding raised; runs on
+            # the worker thread, concurrently with encode_image
+            if f.exception() is None:
+                return
+            with self._cache_lock:
+                if self._embed_cache.get(key) is embedding:
+                    del self._embed_cache[key]
+
+        with self._cache_lock:
+            self._embed_cache[key] = embedding
+            if len(self._embed_cache) > self._EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+        future.add_done_callback(drop_failed)
+        return embedding
+
+    def _encode_sync(self, image: np.ndarray) -> ImageEmbedding:
+        with self._lock:
+            # Use the model's interactive predictor (already created)
+            # The predictor is shared, so we need to reset it for each new image
+            self.predictor.reset_predictor()
+            with self._inference_context():
+                embedding = ImageEmbedding(self.predictor, image)
+            self._active_embedding = embedding
+        return embedding
     
-    def generate(
-        self,
-        request: Any,  # osam.types.GenerateRequest
-    ) -> GenerateResponse:
-        """
-        Generate masks from prompts.
-        
-        Args:
-            request: GenerateRequest with image_embedding and prompt
-            
-        Returns:
-            GenerateResponse with annotations
-        """
-        image_embedding: ImageEmbedding = request.image_embedding
+    def _prompt_arrays(self, request: Any) -> tuple[np.ndarray, np.ndarray]:
+        """Extract (N, 2) point coords and (N,) labels from a request."""
         prompt = request.prompt
         
         # Get points from prompt
@@ -189,52 +412,167 @@ class SAM3Model:
             input_labels = point_labels.astype(np.int32)
         else:
             input_labels = np.ones(len(points), dtype=np.int32)
+        return input_points, input_labels
+
+    def _activate(self, image_embedding: ImageEmbedding) -> None:
+        # The predictor holds the features of the last encoded image only
+        if image_embedding is not self._active_embedding:
+            image_embedding.activate()
+            self._active_embedding = image_embedding
+
+    @staticmethod
+    def _response_from_masks(masks: np.ndarray, scores: np.ndarray) -> GenerateResponse:
+        # Get the best mask (highest score)
+        # masks shape: (C, H, W) where C=1 when multimask_output=False
+        if masks.shape[0] > 0:
+            best_idx = np.argmax(scores) if len(scores) > 0 else 0
+            mask = masks[best_idx].astype(bool)
+            score = float(scores[best_idx]) if len(scores) > 0 else 1.0
+            
+            # Compute bounding box from mask
+            if np.any(mask):
+                # First/last True of the row/column reductions gives the
+                # tight bbox without allocating index arrays via np.where
+                rows = mask.any(axis=1)
+                cols = mask.any(axis=0)
+                ymin = int(rows.argmax())
+                ymax = len(rows) - int(rows[::-1].argmax()) - 1
+                xmin = int(cols.argmax())
+                xmax = len(cols) - int(cols[::-1].argmax()) - 1
+                bbox = BoundingBox(float(xmin), float(ymin), float(xmax), float(ymax))
+            else:
+                bbox = None
+            
+            annotation = Annotation(mask=mask, bounding_box=bbox, score=score)
+            return GenerateResponse(annotations=[annotation])
+        else:
+            logger.warning("No masks returned by SAM3")
+            return GenerateResponse(annotations=[])
+
+    def generate(
+        self,
+        request: Any,  # osam.types.GenerateRequest
+    ) -> GenerateResponse:
+        """
+        Generate masks from prompts.
         
+        Args:
+            request: GenerateRequest with image_embedding and prompt
+            
+        Returns:
+            GenerateResponse with annotations
+        """
+        image_embedding = _resolve_embedding(request.image_embedding)
+        input_points, input_labels = self._prompt_arrays(request)
+
         # Run prediction
         try:
-            # SAM3 predict returns (masks, iou_predictions, low_res_masks)
-            # masks is in CxHxW format where C is number of masks
-            masks, scores, _ = image_embedding.predictor.predict(
-                point_coords=input_points,
-                point_labels=input_labels,
-                multimask_output=False,  # Return single best mask
-                normalize_coords=False,  # Points are already in pixel coordinates
-            )
-            
-            # Get the best mask (highest score)
-            # masks shape: (C, H, W) where C=1 when multimask_output=False
-            if masks.shape[0] > 0:
-                best_idx = np.argmax(scores) if len(scores) > 0 else 0
-                mask = masks[best_idx].astype(bool)
-                score = float(scores[best_idx]) if len(scores) > 0 else 1.0
-                
-                # Compute bounding box from mask
-                if np.any(mask):
-                    rows = np.any(mask, axis=1)
-                    cols = np.any(mask, axis=0)
-                    if np.any(rows) and np.any(cols):
-                        ymin, ymax = np.where(rows)[0][[0, -1]]
-                        xmin, xmax = np.where(cols)[0][[0, -1]]
-                        bbox = BoundingBox(float(xmin), float(ymin), float(xmax), float(ymax))
-                    else:
-                        bbox = None
-                else:
-                    bbox = None
-                
-                annotation = Annotation(mask=mask, bounding_box=bbox, score=score)
-                return GenerateResponse(annotations=[annotation])
-            else:
-                logger.warning("No masks returned by SAM3")
-                return GenerateResponse(annotations=[])
-                
+            with self._lock:
+                self._activate(image_embedding)
+                input_points, input_labels = self._points_to_device(
+                    input_points, input_labels
+                )
+                # SAM3 predict returns (masks, iou_predictions, low_res_masks)
+                # masks is in CxHxW format where C is number of masks
+                with self._inference_context():
+                    masks, scores, _ = image_embedding.predictor.predict(
+                        point_coords=input_points,
+                        point_labels=input_labels,
+                        multimask_output=False,  # Return single best mask
+                        # Points are already in pixel coordinates
+                        normalize_coords=False,
+                    )
+            return self._response_from_masks(masks, scores)
         except Exception as e:
             logger.error(f"SAM3 prediction failed: {e}")
             raise
 
+    def generate_batch(self, requests: list[Any]) -> list[GenerateResponse]:
+        """
+        Generate masks for several prompts on the same image in one decoder pass.
+        
+        Args:
+            requests: GenerateRequests sharing one image_embedding
+            
+        Returns:
+            One GenerateResponse per request, in order
+        """
+        if len(requests) <= 1:
+            return [self.generate(request) for request in requests]
+
+        image_embedding = requests[0].image_embedding
+        if any(r.image_embedding is not image_embedding for r in requests):
+            raise ValueError("Batched requests must share the same image embedding")
+        image_embedding = _resolve_embedding(image_embedding)
+
+        prompts = [self._prompt_arrays(request) for request in requests]
+        n_max = max(len(points) for points, _ in prompts)
+        # Pad to (B, N_max); label -1 marks padding points ignored by the decoder
+        batch_points = np.zeros((len(prompts), n_max, 2), dtype=np.float32)
+        batch_labels = np.full((len(prompts), n_max), -1, dtype=np.int32)
+        for i, (points, labels) in enumerate(prompts):
+            batch_points[i, : len(points)] = points
+            batch_labels[i, : len(labels)] = labels
+
+        try:
+            with self._lock:
+                self._activate(image_embedding)
+                # Batched prompts return masks as BxCxHxW and scores as BxC
+                with self._inference_context():
+                    masks, scores, _ = image_embedding.predictor.predict(
+                        point_coords=batch_points,
+                        point_labels=batch_labels,
+                        multimask_output=False,
+                        normalize_coords=False,
+                    )
+        except Exception as e:
+            logger.error(f"SAM3 batched prediction failed: {e}")
+            raise
+        return [self._response_from_masks(m, sc) for m, sc in zip(masks, scores)]
+
+
+class SAM3ModelType:
+    """Model type factory for SAM3."""
+
+    # Loaded models keyed by (model_name, device), so the weights are built
+    # once per process no matter how many times the factory is called
+    _instances: dict[tuple[str, str], SAM3Model] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __call__(self, device: str | None = None) -> SAM3Model:
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        key = (self.name, device)
+        model = self._instances.get(key)
+        if model is None:
+            model = SAM3Model(self.name, device=device)
+            self._instances[key] = model
+        return model
+    
+    @staticmethod
+    def get_size():
+        """Return model size in bytes (None = not downloaded, needs download)."""
+        # SAM3 models are downloaded on first use via huggingface_hub
+        # Return None to indicate they need to be downloaded
+        return None
+    
+    def pull(self):
+        """Download model (called by download_ai_model)."""
+        # Models are downloaded automatically on first use
+        # This is a no-op, but we could pre-download here if needed
+        pass
+
+
+_MODEL_TYPE_CACHE: dict[str, SAM3ModelType] = {}
+
 
 def get_sam3_model_type(model_name: str):
     """
-    Get SAM3 model type (factory function compatible with osam.apis.get_model_type_by_name).
+    Get SAM3 model type.
+
+    Factory function compatible with osam.apis.get_model_type_by_name.
     
     Args:
         model_name: Model name like 'sam3:small', 'sam3:latest', 'sam3:large'
@@ -242,32 +580,15 @@ def get_sam3_model_type(model_name: str):
     Returns:
         Model class that can be instantiated
     """
+    if model_name in _MODEL_TYPE_CACHE:
+        return _MODEL_TYPE_CACHE[model_name]
+
     if not SAM3_AVAILABLE:
         raise ImportError("SAM3 is not available. Install with: pip install git+https://github.com/facebookresearch/sam3.git")
     
-    if not model_name.startswith("sam3:"):
+    if model_name[: len(_SAM3_PREFIX)] != _SAM3_PREFIX:
         raise ValueError(f"Not a SAM3 model: {model_name}")
     
-    class SAM3ModelType:
-        """Model type factory for SAM3."""
-        def __init__(self, name: str):
-            self.name = name
-        
-        def __call__(self, *args, **kwargs):
-            return SAM3Model(self.name, *args, **kwargs)
-        
-        @staticmethod
-        def get_size():
-            """Return model size in bytes (None = not downloaded, needs download)."""
-            # SAM3 models are downloaded on first use via huggingface_hub
-            # Return None to indicate they need to be downloaded
-            return None
-        
-        def pull(self):
-            """Download model (called by download_ai_model)."""
-            # Models are downloaded automatically on first use
-            # This is a no-op, but we could pre-download here if needed
-            pass
-    
-    return SAM3ModelType(model_name)
-
+    model_type = SAM3ModelType(model_name)
+    _MODEL_TYPE_CACHE[model_name] = model_type
+    return model_type
@@ -165,6 +165,7 @@ class Canvas(QtWidgets.QWidget):
         ]:
             raise ValueError(f"Unsupported createMode: {value}")
         self._createMode = value
+        self._prefetch_ai_image_embedding()
 
     def set_ai_model_name(self, model_name: str) -> None:
         logger.debug("Setting AI model to {!r}", model_name)
@@ -212,6 +213,22 @@ class Canvas(QtWidgets.QWidget):
         logger.debug("cached image embedding for key: {!r}", cache_key)
         return image_embedding
 
+    def _prefetch_ai_image_embedding(self) -> None:
+        # SAM3 encodes in the background, so starting as soon as the image is
+        # shown overlaps the encoder with the user's first click. Other models
+        # encode synchronously and still encode on first use, and no model is
+        # loaded just to prefetch.
+        if (
+            self.createMode not in ["ai_polygon", "ai_mask"]
+            or not self._ai_model_name.startswith("sam3:")
+            or self._ai_model_cache is None
+            or self._ai_model_cache.name != self._ai_model_name
+            or self.pixmap is None
+            or self.pixmap.isNull()
+        ):
+            return
+        self._get_ai_image_embedding()
+
     def storeShapes(self):
         shapesBackup = []
         for shape in self.shapes:
@@ -1249,6 +1266,7 @@ class Canvas(QtWidgets.QWidget):
         self.pixmap = pixmap
         if clear_shapes:
             self.shapes = []
+        self._prefetch_ai_image_embedding()
         self.update()
 
     def loadShapes(self, shapes, replace=True):
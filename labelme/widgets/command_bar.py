@@ -6,6 +6,10 @@ from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import Qt
 
+# Command syntax: optional whitespace, optional number, optional whitespace,
+# h or l, optional whitespace
+_CMD_RE = re.compile(r"^\s*(\d+)?\s*([hl])\s*$")
+
 
 class CommandBar(QtWidgets.QLineEdit):
     """Vim-like command bar for navigation commands."""
@@ -38,7 +42,8 @@ class CommandBar(QtWidgets.QLineEdit):
         if not text.startswith(":"):
             # If user deletes the colon, restore it
             cursor_pos = self.cursorPosition()
-            self.setText(":" + text.lstrip(":"))
+            # text has no leading colon here, so no stripping is needed
+            self.setText(":" + text)
             # Restore cursor position
             self.setCursorPosition(min(cursor_pos + 1, len(self.text())))
     
@@ -53,9 +58,7 @@ class CommandBar(QtWidgets.QLineEdit):
         command = text[1:].strip()
         
         # Parse command: [N]h or [N]l
-        # Pattern: optional whitespace, optional number, optional whitespace, h or l, optional whitespace
-        pattern = r'^\s*(\d+)?\s*([hl])\s*$'
-        match = re.match(pattern, command)
+        match = _CMD_RE.match(command)
         
         if match:
             count_str, direction = match.groups()
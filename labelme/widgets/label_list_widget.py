@@ -11,7 +11,7 @@ from PyQt5.QtWidgets import QStyle
 # https://stackoverflow.com/a/2039745/4158863
 class HTMLDelegate(QtWidgets.QStyledItemDelegate):
     def __init__(self, parent=None):
-        super().__init__()
+        super().__init__(parent)
         self.doc = QtGui.QTextDocument(self)
 
     def paint(self, painter, option, index):
@@ -133,7 +133,7 @@ class LabelListWidget(QtWidgets.QListView):
         self._model.setItemPrototype(LabelListWidgetItem())
         self.setModel(self._model)
 
-        self.setItemDelegate(HTMLDelegate())
+        self.setItemDelegate(HTMLDelegate(parent=self))
         self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
         self.setDefaultDropAction(Qt.MoveAction)
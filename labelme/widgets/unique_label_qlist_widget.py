@@ -1,5 +1,4 @@
 import html
-import re
 from typing import Optional
 
 from PyQt5 import QtGui
@@ -8,6 +7,21 @@ from PyQt5.QtCore import Qt
 
 from .label_list_widget import HTMLDelegate
 
+# Hex form of the label color, stored on each item when it is added so the
+# text can be rebuilt without parsing it
+_COLOR_HEX_ROLE = Qt.UserRole + 1
+
+# Display format: "1. label_name ●" or just "label_name ●" if no shortcut
+_WITH_N = "{n}. {label} <font color='#{hex}'>●</font>".format
+_NO_N = "{label} <font color='#{hex}'>●</font>".format
+
+# Shortcut keys by row: 1-9 for rows 0-8, 0 for row 9 (10th label)
+_SHORTCUTS = tuple(str(i) for i in range(1, 10)) + ("0",)
+
+
+def _shortcut_text(index: int) -> str:
+    return _SHORTCUTS[index] if 0 <= index < len(_SHORTCUTS) else ""
+
 
 class _EscapableQListWidget(QtWidgets.QListWidget):
     def keyPressEvent(self, keyEvent: QtGui.QKeyEvent) -> None:  # type: ignore
@@ -20,6 +34,8 @@ class UniqueLabelQListWidget(_EscapableQListWidget):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setItemDelegate(HTMLDelegate(parent=self))
+        # label -> item, kept in sync by add_label_item/takeItem/clear
+        self._label_index: dict[str, QtWidgets.QListWidgetItem] = {}
 
     def mousePressEvent(self, mouseEvent: QtGui.QMouseEvent) -> None:  # type: ignore
         super().mousePressEvent(mouseEvent)
@@ -27,11 +43,17 @@ class UniqueLabelQListWidget(_EscapableQListWidget):
             self.clearSelection()
 
     def find_label_item(self, label: str) -> Optional[QtWidgets.QListWidgetItem]:
-        for row in range(self.count()):
-            item = self.item(row)
-            if item and item.data(Qt.UserRole) == label:
-                return item
-        return None
+        return self._label_index.get(label)
+
+    def takeItem(self, row: int) -> Optional[QtWidgets.QListWidgetItem]:  # type: ignore[override]
+        item = super().takeItem(row)
+        if item is not None:
+            self._label_index.pop(item.data(Qt.UserRole), None)
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._label_index.clear()
 
     def add_label_item(self, label: str, color: tuple[int, int, int], index: Optional[int] = None) -> None:
         if self.find_label_item(label):
@@ -39,79 +61,35 @@ class UniqueLabelQListWidget(_EscapableQListWidget):
 
         item = QtWidgets.QListWidgetItem()
         item.setData(Qt.UserRole, label)  # for find_label_item
+        item.setData(_COLOR_HEX_ROLE, "%02x%02x%02x" % tuple(color))  # for refresh_label_numbers
         
         # If index is not provided, use current count
         if index is None:
             index = self.count()
         
-        # Format shortcut number: 1-9 for indices 0-8, 0 for index 9 (10th label)
-        # Index 0 -> "1", Index 1 -> "2", ..., Index 8 -> "9", Index 9 -> "0"
-        if index < 9:
-            shortcut_text = str(index + 1)
-        elif index == 9:
-            shortcut_text = "0"
-        else:
-            shortcut_text = ""
-        
-        # Display format: "1. label_name ●" or just "label_name ●" if no shortcut
+        self._set_item_text(item, _shortcut_text(index))
+        self.addItem(item)
+        self._label_index[label] = item
+
+    def _set_item_text(self, item: QtWidgets.QListWidgetItem, shortcut_text: str) -> None:
+        label = html.escape(item.data(Qt.UserRole))
+        hexc = item.data(_COLOR_HEX_ROLE)
         if shortcut_text:
-            item.setText(
-                f"{shortcut_text}. {html.escape(label)} "
-                f"<font color='#{color[0]:02x}{color[1]:02x}{color[2]:02x}'>●</font>"
-            )
+            item.setText(_WITH_N(n=shortcut_text, label=label, hex=hexc))
         else:
-            item.setText(
-                f"{html.escape(label)} "
-                f"<font color='#{color[0]:02x}{color[1]:02x}{color[2]:02x}'>●</font>"
-            )
-        self.addItem(item)
+            item.setText(_NO_N(label=label, hex=hexc))
     
     def refresh_label_numbers(self) -> None:
         """Refresh the shortcut numbers for all labels based on their current order."""
-        for i in range(self.count()):
-            item = self.item(i)
-            if item:
-                label = item.data(Qt.UserRole)
-                current_text = item.text()
-                
-                # Extract color from HTML if present (handle both single and double quotes)
-                color_match = None
-                # Try single quotes first
-                match = re.search(r"color=['\"]#([0-9a-fA-F]{6})['\"]", current_text)
-                if match:
-                    hex_color = match.group(1)
-                    color_match = (
-                        int(hex_color[0:2], 16),
-                        int(hex_color[2:4], 16),
-                        int(hex_color[4:6], 16),
-                    )
-                
-                # Format shortcut number: 1-9 for indices 0-8, 0 for index 9 (10th label)
-                # Index 0 -> "1", Index 1 -> "2", ..., Index 8 -> "9", Index 9 -> "0"
-                if i < 9:
-                    shortcut_text = str(i + 1)
-                elif i == 9:
-                    shortcut_text = "0"
-                else:
-                    shortcut_text = ""
-                
-                # Rebuild text with updated shortcut number
-                if color_match:
-                    if shortcut_text:
-                        item.setText(
-                            f"{shortcut_text}. {html.escape(label)} "
-                            f"<font color='#{color_match[0]:02x}{color_match[1]:02x}{color_match[2]:02x}'>●</font>"
-                        )
-                    else:
-                        item.setText(
-                            f"{html.escape(label)} "
-                            f"<font color='#{color_match[0]:02x}{color_match[1]:02x}{color_match[2]:02x}'>●</font>"
-                        )
-                else:
-                    # Fallback: if we can't extract color, just update the number prefix
-                    # Remove existing number prefix if present (e.g., "1. " or "0. ")
-                    text_without_prefix = re.sub(r'^\d+\.\s*', '', current_text)
-                    if shortcut_text:
-                        item.setText(f"{shortcut_text}. {text_without_prefix}")
-                    else:
-                        item.setText(text_without_prefix)
+        # Coalesce the per-item repaints into one viewport update
+        self.setUpdatesEnabled(False)
+        self.blockSignals(True)
+        try:
+            for i in range(self.count()):
+                item = self.item(i)
+                if item:
+                    self._set_item_text(item, _shortcut_text(i))
+        finally:
+            self.blockSignals(False)
+            self.setUpdatesEnabled(True)
+            self.viewport().update()
@@ -8,20 +8,54 @@ This script verifies that:
 3. Model selection dropdown logic works with SAM3
 """
 
-import sys
+import ast
+import functools
 import os
+import sys
 
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+
+@functools.lru_cache(maxsize=None)
+def _read_app_source():
+    """Read labelme/app.py once; the scanning tests share the bytes."""
+    # Read the source file directly to avoid import dependencies
+    app_file = os.path.join(os.path.dirname(__file__), "labelme", "app.py")
+    with open(app_file, "rb") as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_model_names():
+    """Return the MODEL_NAMES (model_name, ui_name) pairs defined in app.py."""
+    for node in ast.walk(ast.parse(_read_app_source())):
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign):
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == "MODEL_NAMES" for t in targets):
+            return tuple(ast.literal_eval(node.value))
+    return ()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_model_name_sets():
+    """Return (model names, UI names) from MODEL_NAMES, built in one pass."""
+    names, ui_names = set(), set()
+    for name, ui_name in _get_model_names():
+        names.add(name)
+        ui_names.add(ui_name)
+    return frozenset(names), frozenset(ui_names)
+
+
 def test_sam3_in_model_names():
     """Test that SAM3 models are in the MODEL_NAMES list."""
     print("Test 1: Checking SAM3 models in MODEL_NAMES list...")
     
-    # Read the source file directly to avoid import dependencies
-    app_file = os.path.join(os.path.dirname(__file__), "labelme", "app.py")
-    with open(app_file, "r") as f:
-        content = f.read()
+    model_names, _ = _get_model_name_sets()
     
     # Check if SAM3 models are present
     sam3_models = [
@@ -32,7 +66,7 @@ def test_sam3_in_model_names():
     
     found_models = []
     for model in sam3_models:
-        if f'"{model}"' in content or f"'{model}'" in content:
+        if model in model_names:
             found_models.append(model)
             print(f"  ✓ Found {model}")
         else:
@@ -50,10 +84,7 @@ def test_sam3_ui_names():
     """Test that SAM3 UI names are correct."""
     print("\nTest 2: Checking SAM3 UI names...")
     
-    # Read the source file directly to avoid import dependencies
-    app_file = os.path.join(os.path.dirname(__file__), "labelme", "app.py")
-    with open(app_file, "r") as f:
-        content = f.read()
+    _, ui_names = _get_model_name_sets()
     
     expected_ui_names = [
         "Sam3 (speed)",
@@ -63,7 +94,7 @@ def test_sam3_ui_names():
     
     found_names = []
     for name in expected_ui_names:
-        if name in content:
+        if name in ui_names:
             found_names.append(name)
             print(f"  ✓ Found UI name: {name}")
         else:
@@ -89,13 +120,24 @@ def test_osam_sam3_support():
         sam3_models = ["sam3:small", "sam3:latest", "sam3:large"]
         osam_supported = []
         
-        for model_name in sam3_models:
-            try:
-                model_type = osam.apis.get_model_type_by_name(model_name)
-                print(f"  ✓ osam recognizes {model_name}")
-                osam_supported.append(model_name)
-            except Exception as e:
-                print(f"  ⚠ osam does not recognize {model_name}: {e}")
+        # Read osam's registry once instead of probing (and failing) per name
+        registered = getattr(osam.apis, "registered_model_types", None)
+        if registered is not None:
+            known = {model_type.name for model_type in registered}
+            for model_name in sam3_models:
+                if model_name in known:
+                    print(f"  ✓ osam recognizes {model_name}")
+                    osam_supported.append(model_name)
+                else:
+                    print(f"  ⚠ osam does not recognize {model_name}")
+        else:
+            for model_name in sam3_models:
+                try:
+                    osam.apis.get_model_type_by_name(model_name)
+                    print(f"  ✓ osam recognizes {model_name}")
+                    osam_supported.append(model_name)
+                except Exception as e:
+                    print(f"  ⚠ osam does not recognize {model_name}: {e}")
         
         # Check SAM3 adapter
         print("  ℹ Checking SAM3 adapter...")
@@ -154,8 +196,9 @@ def test_model_selection_logic():
     ]
     
     # Extract model names and UI names
-    model_names = [name for name, _ in MODEL_NAMES]
-    model_ui_names = [ui_name for _, ui_name in MODEL_NAMES]
+    model_set = frozenset(name for name, _ in MODEL_NAMES)
+    ui_set = frozenset(ui_name for _, ui_name in MODEL_NAMES)
+    ui_to_model = {ui_name: name for name, ui_name in MODEL_NAMES}
     
     # Check SAM3 models are in the list
     sam3_models = ["sam3:small", "sam3:latest", "sam3:large"]
@@ -163,7 +206,7 @@ def test_model_selection_logic():
     
     all_found = True
     for model, ui_name in zip(sam3_models, sam3_ui_names):
-        if model in model_names and ui_name in model_ui_names:
+        if model in model_set and ui_name in ui_set:
             print(f"  ✓ {model} -> {ui_name} correctly mapped")
         else:
             print(f"  ✗ {model} -> {ui_name} mapping issue")
@@ -172,9 +215,8 @@ def test_model_selection_logic():
     # Test default selection logic (simulating the code from app.py)
     test_defaults = ["Sam3 (balanced)", "Sam2 (balanced)", "Sam (balanced)"]
     for default in test_defaults:
-        if default in model_ui_names:
-            index = model_ui_names.index(default)
-            selected_model = model_names[index]
+        if default in ui_to_model:
+            selected_model = ui_to_model[default]
             print(f"  ✓ Default '{default}' correctly maps to '{selected_model}'")
         else:
             print(f"  ✗ Default '{default}' not found in model_ui_names")
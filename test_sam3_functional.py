@@ -9,6 +9,10 @@ This script tests:
 4. Testing both ai_polygon and ai_mask modes
 """
 
+import functools
+import hashlib
+import importlib.util
+import inspect
 import os
 import sys
 import tempfile
@@ -17,49 +21,55 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Check for required dependencies
-DEPENDENCIES = {
-    'numpy': False,
-    'imgviz': False,
-    'PyQt5': False,
-    'osam': False,
-}
 
-try:
-    import numpy as np
-    DEPENDENCIES['numpy'] = True
-except ImportError:
-    print("WARNING: numpy not installed")
-
-try:
-    import imgviz
-    DEPENDENCIES['imgviz'] = True
-except ImportError:
-    print("WARNING: imgviz not installed")
-
-try:
-    from PyQt5.QtCore import QPointF
-    from PyQt5.QtGui import QImage, QPixmap
-    DEPENDENCIES['PyQt5'] = True
-except ImportError:
-    print("WARNING: PyQt5 not installed")
-
-try:
-    import osam
-    DEPENDENCIES['osam'] = True
-except ImportError:
-    print("WARNING: osam library not installed")
+# Optional dependencies are probed without importing them; osam pulls in
+# torch/onnxruntime and PyQt5 loads Qt, so each test imports what it uses
+def _have(pkg):
+    """Return whether ``pkg`` is installed, without importing it."""
+    return importlib.util.find_spec(pkg) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def deps():
+    """Return the availability of each optional dependency, probed once."""
+    return {pkg: _have(pkg) for pkg in ("numpy", "imgviz", "PyQt5", "osam")}
+
+
+def _log(*args, **kwargs):
+    """Print progress, unless the tests are being run by pytest."""
+    # Checked per call: pytest only sets the variable while a test is running,
+    # not while it imports this module for collection
+    if not os.environ.get("PYTEST_CURRENT_TEST"):
+        print(*args, **kwargs)
 
-OSAM_AVAILABLE = DEPENDENCIES['osam']
+
+# Loaded models keyed by name, and image embeddings keyed by the model name,
+# image size and a digest of the pixels; encoding is deterministic for a fixed
+# image, so the tests below share one encoder run instead of repeating it
+_MODEL_CACHE = {}
+_EMBED_CACHE = {}
+
+# Default for the artifacts the later tests take from earlier ones; passing
+# None means the earlier step ran and produced nothing
+_UNSET = object()
 
 
 def create_test_image(width=400, height=300):
     """Create a simple test image with a colored rectangle."""
-    if not DEPENDENCIES['numpy']:
+    if not deps()['numpy']:
         raise ImportError("numpy is required for this test")
     
+    # Callers get their own copy so they cannot alter the shared template
+    return _render_test_image(width, height).copy()
+
+
+@functools.lru_cache(maxsize=4)
+def _render_test_image(width, height):
+    """Draw the read-only test image template for one size."""
+    import numpy as np
+
     # Create a simple test image: white background with a colored rectangle
-    image = np.ones((height, width, 3), dtype=np.uint8) * 255
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
     
     # Add a colored rectangle in the center
     center_x, center_y = width // 2, height // 2
@@ -72,29 +82,95 @@ def create_test_image(width=400, height=300):
     # Draw a blue rectangle
     image[y1:y2, x1:x2] = [100, 150, 200]
     
+    image.flags.writeable = False
     return image
 
 
+@functools.lru_cache(maxsize=None)
+def _get_device():
+    """Return the fastest torch device available, or None without torch."""
+    try:
+        import torch
+    except ImportError:
+        return None
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _get_encoder_precision(model):
+    """Describe the precision ``model`` encodes images in.
+
+    The SAM3 adapter already encodes under bf16 autocast on CUDA devices that
+    support it (fp16 on older ones); everything else runs in fp32.
+    """
+    if getattr(model, "device", None) != "cuda":
+        return "float32"
+    import torch
+
+    return "bfloat16" if torch.cuda.is_bf16_supported() else "float16"
+
+
+def _get_model(model_name):
+    """Load ``model_name`` through osam once and reuse it afterwards."""
+    model = _MODEL_CACHE.get(model_name)
+    if model is None:
+        import osam
+
+        model_type = osam.apis.get_model_type_by_name(model_name)
+        # Torch-backed model types (e.g. the SAM3 adapter) take a device;
+        # ONNX-backed osam models choose their execution provider themselves
+        device = _get_device()
+        if device is not None and "device" in inspect.signature(model_type).parameters:
+            model = model_type(device=device)
+        else:
+            model = model_type()
+        _MODEL_CACHE[model_name] = model
+    return model
+
+
+def _get_embedding(model, rgb_image):
+    """Encode ``rgb_image`` with ``model``, reusing a previous identical run."""
+    digest = hashlib.blake2b(rgb_image.tobytes(), digest_size=8).digest()
+    key = (model.name, *rgb_image.shape[:2], digest)
+    image_embedding = _EMBED_CACHE.get(key)
+    if image_embedding is None:
+        image_embedding = _EMBED_CACHE[key] = model.encode_image(image=rgb_image)
+    return image_embedding
+
+
 def numpy_to_qimage(arr):
     """Convert numpy array to QImage."""
-    if not DEPENDENCIES['PyQt5']:
+    if not deps()['PyQt5']:
         raise ImportError("PyQt5 is required for this test")
     
+    import numpy as np
+    from PyQt5.QtGui import QImage
+
+    arr = np.ascontiguousarray(arr)
     height, width, channel = arr.shape
     bytes_per_line = 3 * width
     q_image = QImage(arr.data, width, height, bytes_per_line, QImage.Format_RGB888)
-    return q_image.copy()  # Make a copy to ensure data persists
+    # QImage only views the buffer; keep the array alive with the image
+    # instead of copying every pixel
+    q_image._numpy_owner = arr
+    return q_image
 
 
 def test_sam3_model_availability():
     """Test that SAM3 models are available in osam."""
-    print("\n" + "=" * 60)
-    print("Test 1: SAM3 Model Availability")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 1: SAM3 Model Availability")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
+
+    import osam
     
     sam3_models = ["sam3:small", "sam3:latest", "sam3:large"]
     available_models = []
@@ -102,30 +178,32 @@ def test_sam3_model_availability():
     for model_name in sam3_models:
         try:
             model_type = osam.apis.get_model_type_by_name(model_name)
-            print(f"  ✓ Model '{model_name}' is available")
+            _log(f"  ✓ Model '{model_name}' is available")
             available_models.append((model_name, model_type))
         except Exception as e:
-            print(f"  ✗ Model '{model_name}' not available: {e}")
+            _log(f"  ✗ Model '{model_name}' not available: {e}")
     
     if len(available_models) > 0:
-        print(f"\n  ✓ {len(available_models)}/{len(sam3_models)} SAM3 models available")
+        _log(f"\n  ✓ {len(available_models)}/{len(sam3_models)} SAM3 models available")
         return available_models
     else:
-        print(f"\n  ⚠ No SAM3 models available in current osam version")
-        print(f"  ℹ This is expected if osam library hasn't been updated with SAM3 support yet")
-        print(f"  ℹ The labelme code is ready - once osam adds SAM3 support, it will work automatically")
+        _log(f"\n  ⚠ No SAM3 models available in current osam version")
+        _log(f"  ℹ This is expected if osam library hasn't been updated with SAM3 support yet")
+        _log(f"  ℹ The labelme code is ready - once osam adds SAM3 support, it will work automatically")
         return None
 
 
 def test_sam3_model_download():
     """Test downloading SAM3 model."""
-    print("\n" + "=" * 60)
-    print("Test 2: SAM3 Model Download")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 2: SAM3 Model Download")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
+
+    import osam
     
     # Test with sam3:small (smallest, fastest to download)
     model_name = "sam3:small"
@@ -136,11 +214,11 @@ def test_sam3_model_download():
         # Check if model is already downloaded
         model_size = model_type.get_size()
         if model_size is not None:
-            print(f"  ✓ Model '{model_name}' is already downloaded ({model_size} bytes)")
+            _log(f"  ✓ Model '{model_name}' is already downloaded ({model_size} bytes)")
             return model_type
         
-        print(f"  ℹ Model '{model_name}' needs to be downloaded...")
-        print(f"  ℹ This may take a while. Starting download...")
+        _log(f"  ℹ Model '{model_name}' needs to be downloaded...")
+        _log(f"  ℹ This may take a while. Starting download...")
         
         # Download the model
         model_type.pull()
@@ -148,111 +226,121 @@ def test_sam3_model_download():
         # Verify download
         model_size = model_type.get_size()
         if model_size is not None:
-            print(f"  ✓ Model '{model_name}' downloaded successfully ({model_size} bytes)")
+            _log(f"  ✓ Model '{model_name}' downloaded successfully ({model_size} bytes)")
             return model_type
         else:
-            print(f"  ✗ Model download verification failed")
+            _log(f"  ✗ Model download verification failed")
             return None
             
     except Exception as e:
-        print(f"  ⚠ Failed to download model '{model_name}': {e}")
-        print(f"  ℹ This is expected if osam doesn't support SAM3 yet")
+        _log(f"  ⚠ Failed to download model '{model_name}': {e}")
+        _log(f"  ℹ This is expected if osam doesn't support SAM3 yet")
         return None
 
 
 def test_sam3_model_loading():
     """Test loading SAM3 model."""
-    print("\n" + "=" * 60)
-    print("Test 3: SAM3 Model Loading")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 3: SAM3 Model Loading")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
     
     model_name = "sam3:small"
     
     try:
-        model_type = osam.apis.get_model_type_by_name(model_name)
-        model = model_type()
+        model = _get_model(model_name)
         
-        print(f"  ✓ Model '{model_name}' loaded successfully")
-        print(f"  ✓ Model name: {model.name}")
+        _log(f"  ✓ Model '{model_name}' loaded successfully")
+        _log(f"  ✓ Model name: {model.name}")
+        _log(f"  ℹ Device: {getattr(model, 'device', 'chosen by osam')}")
         
         return model
         
     except Exception as e:
-        print(f"  ⚠ Failed to load model '{model_name}': {e}")
-        print(f"  ℹ This is expected if osam doesn't support SAM3 yet")
+        _log(f"  ⚠ Failed to load model '{model_name}': {e}")
+        _log(f"  ℹ This is expected if osam doesn't support SAM3 yet")
         return None
 
 
-def test_sam3_image_embedding():
+def test_sam3_image_embedding(model=_UNSET):
     """Test creating image embedding with SAM3."""
-    print("\n" + "=" * 60)
-    print("Test 4: SAM3 Image Embedding")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 4: SAM3 Image Embedding")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
     
-    model = test_sam3_model_loading()
+    if model is _UNSET:
+        model = test_sam3_model_loading()
     if model is None:
-        print("  ✗ Cannot test image embedding: model not loaded")
+        _log("  ✗ Cannot test image embedding: model not loaded")
         return None
     
     try:
-        if not DEPENDENCIES['imgviz']:
-            print("  ⚠ SKIPPED: imgviz not installed")
+        if not deps()['imgviz']:
+            _log("  ⚠ SKIPPED: imgviz not installed")
             return None
+        import imgviz
         
         # Create test image
         test_image = create_test_image()
         rgb_image = imgviz.asrgb(test_image)
         
         # Create image embedding
-        print("  ℹ Creating image embedding...")
-        image_embedding = model.encode_image(image=rgb_image)
+        _log(f"  ℹ Creating image embedding ({_get_encoder_precision(model)})...")
+        image_embedding = _get_embedding(model, rgb_image)
         
-        print(f"  ✓ Image embedding created successfully")
-        print(f"  ✓ Embedding type: {type(image_embedding)}")
+        _log(f"  ✓ Image embedding created successfully")
+        _log(f"  ✓ Embedding type: {type(image_embedding)}")
         
         return image_embedding
         
     except Exception as e:
-        print(f"  ✗ Failed to create image embedding: {e}")
+        _log(f"  ✗ Failed to create image embedding: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
-def test_sam3_mask_generation():
+def test_sam3_mask_generation(model=_UNSET, image_embedding=_UNSET):
     """Test generating mask with SAM3."""
-    print("\n" + "=" * 60)
-    print("Test 5: SAM3 Mask Generation")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 5: SAM3 Mask Generation")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
+
+    import numpy as np
+    import osam
     
-    model = test_sam3_model_loading()
+    if model is _UNSET:
+        model = test_sam3_model_loading()
     if model is None:
-        print("  ✗ Cannot test mask generation: model not loaded")
+        _log("  ✗ Cannot test mask generation: model not loaded")
         return None
     
     try:
-        if not DEPENDENCIES['imgviz']:
-            print("  ⚠ SKIPPED: imgviz not installed")
+        if not deps()['imgviz']:
+            _log("  ⚠ SKIPPED: imgviz not installed")
             return None
+        import imgviz
         
         # Create test image
         test_image = create_test_image()
-        rgb_image = imgviz.asrgb(test_image)
         
         # Create image embedding
-        image_embedding = model.encode_image(image=rgb_image)
+        if image_embedding is _UNSET:
+            image_embedding = _get_embedding(model, imgviz.asrgb(test_image))
+        if image_embedding is None:
+            _log("  ✗ Cannot test mask generation: image embedding not created")
+            return None
         
         # Create a point prompt in the center of the image
         height, width = test_image.shape[:2]
@@ -260,7 +348,7 @@ def test_sam3_mask_generation():
         point_labels = np.array([1], dtype=np.int32)  # 1 = foreground point
         
         # Generate mask
-        print("  ℹ Generating mask with point prompt...")
+        _log("  ℹ Generating mask with point prompt...")
         response = model.generate(
             request=osam.types.GenerateRequest(
                 model=model.name,
@@ -273,65 +361,150 @@ def test_sam3_mask_generation():
         )
         
         if not response.annotations:
-            print("  ✗ No annotations returned")
+            _log("  ✗ No annotations returned")
             return None
         
         annotation = response.annotations[0]
         mask = annotation.mask
         
-        print(f"  ✓ Mask generated successfully")
-        print(f"  ✓ Mask shape: {mask.shape}")
-        print(f"  ✓ Mask dtype: {mask.dtype}")
-        print(f"  ✓ Mask has {np.sum(mask)} foreground pixels")
+        _log(f"  ✓ Mask generated successfully")
+        _log(f"  ✓ Mask shape: {mask.shape}")
+        _log(f"  ✓ Mask dtype: {mask.dtype}")
+        _log(f"  ✓ Mask has {np.sum(mask)} foreground pixels")
         
         if annotation.bounding_box:
             bbox = annotation.bounding_box
-            print(f"  ✓ Bounding box: ({bbox.xmin}, {bbox.ymin}) to ({bbox.xmax}, {bbox.ymax})")
+            _log(f"  ✓ Bounding box: ({bbox.xmin}, {bbox.ymin}) to ({bbox.xmax}, {bbox.ymax})")
         
         return mask
         
     except Exception as e:
-        print(f"  ✗ Failed to generate mask: {e}")
+        _log(f"  ✗ Failed to generate mask: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def test_sam3_mask_generation_batched(model=_UNSET, image_embedding=_UNSET):
+    """Test generating masks for several point prompts in one call."""
+    _log("\n" + "=" * 60)
+    _log("Test 5b: SAM3 Batched Mask Generation")
+    _log("=" * 60)
+    
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
+        return None
+
+    import numpy as np
+    import osam
+    
+    if model is _UNSET:
+        model = test_sam3_model_loading()
+    if model is None:
+        _log("  ✗ Cannot test batched mask generation: model not loaded")
+        return None
+    
+    try:
+        if not deps()['imgviz']:
+            _log("  ⚠ SKIPPED: imgviz not installed")
+            return None
+        import imgviz
+        
+        test_image = create_test_image()
+        if image_embedding is _UNSET:
+            image_embedding = _get_embedding(model, imgviz.asrgb(test_image))
+        if image_embedding is None:
+            _log("  ✗ Cannot test batched mask generation: image embedding not created")
+            return None
+        
+        # One independent foreground point per prompt: the rectangle's center
+        # and two background corners
+        height, width = test_image.shape[:2]
+        points = np.array(
+            [[width // 2, height // 2], [width // 8, height // 8], [width * 7 // 8, height * 7 // 8]],
+            dtype=np.float32,
+        )
+        # Every prompt takes a one-row view into these two buffers instead of
+        # allocating its own arrays
+        point_labels = np.ones(len(points), dtype=np.int32)
+        requests = [
+            osam.types.GenerateRequest(
+                model=model.name,
+                image_embedding=image_embedding,
+                prompt=osam.types.Prompt(
+                    points=points[i : i + 1],
+                    point_labels=point_labels[i : i + 1],
+                ),
+            )
+            for i in range(len(points))
+        ]
+        
+        # The SAM3 adapter decodes every prompt in one pass; plain osam models
+        # answer one request at a time
+        if hasattr(model, "generate_batch"):
+            _log(f"  ℹ Generating {len(requests)} masks in one batched call...")
+            responses = model.generate_batch(requests)
+        else:
+            _log(f"  ℹ Model has no batched path, generating {len(requests)} masks one by one...")
+            responses = [model.generate(request=request) for request in requests]
+        
+        if len(responses) != len(requests):
+            _log(f"  ✗ Expected {len(requests)} responses, got {len(responses)}")
+            return False
+        if not all(response.annotations for response in responses):
+            _log("  ✗ Some prompts returned no annotations")
+            return False
+        
+        _log(f"  ✓ Generated {len(responses)} masks, one per prompt")
+        return True
+        
+    except Exception as e:
+        _log(f"  ✗ Failed to generate batched masks: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
-def test_sam3_polygon_creation():
+def test_sam3_polygon_creation(mask=_UNSET):
     """Test creating polygon from SAM3 mask."""
-    print("\n" + "=" * 60)
-    print("Test 6: SAM3 Polygon Creation")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 6: SAM3 Polygon Creation")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
     
     # Import polygon_from_mask function
     from labelme._automation import polygon_from_mask
     
-    mask = test_sam3_mask_generation()
+    if mask is _UNSET:
+        mask = test_sam3_mask_generation()
     if mask is None:
-        print("  ✗ Cannot test polygon creation: mask not generated")
+        _log("  ✗ Cannot test polygon creation: mask not generated")
         return None
     
     try:
         # Convert mask to polygon
-        print("  ℹ Converting mask to polygon...")
+        _log("  ℹ Converting mask to polygon...")
         polygon_points = polygon_from_mask.compute_polygon_from_mask(mask=mask)
         
-        print(f"  ✓ Polygon created successfully")
-        print(f"  ✓ Polygon has {len(polygon_points)} points")
-        print(f"  ✓ Polygon shape: {polygon_points.shape}")
+        shape = polygon_points.shape
+        n_points = shape[0]
+        _log(f"  ✓ Polygon created successfully")
+        _log(f"  ✓ Polygon has {n_points} points")
+        _log(f"  ✓ Polygon shape: {shape}")
         
-        if len(polygon_points) > 0:
-            print(f"  ✓ First point: ({polygon_points[0][0]:.2f}, {polygon_points[0][1]:.2f})")
-            print(f"  ✓ Last point: ({polygon_points[-1][0]:.2f}, {polygon_points[-1][1]:.2f})")
+        if n_points > 0:
+            # One conversion to Python floats instead of four element lookups
+            (first_x, first_y), (last_x, last_y) = polygon_points[[0, n_points - 1]].tolist()
+            _log(f"  ✓ First point: ({first_x:.2f}, {first_y:.2f})")
+            _log(f"  ✓ Last point: ({last_x:.2f}, {last_y:.2f})")
         
         return polygon_points
         
     except Exception as e:
-        print(f"  ✗ Failed to create polygon: {e}")
+        _log(f"  ✗ Failed to create polygon: {e}")
         import traceback
         traceback.print_exc()
         return None
@@ -339,20 +512,22 @@ def test_sam3_polygon_creation():
 
 def test_sam3_integration_with_canvas():
     """Test SAM3 integration with Canvas widget."""
-    print("\n" + "=" * 60)
-    print("Test 7: SAM3 Integration with Canvas")
-    print("=" * 60)
+    _log("\n" + "=" * 60)
+    _log("Test 7: SAM3 Integration with Canvas")
+    _log("=" * 60)
     
-    if not OSAM_AVAILABLE:
-        print("  ⚠ SKIPPED: osam library not installed")
+    if not deps()['osam']:
+        _log("  ⚠ SKIPPED: osam library not installed")
         return None
     
     try:
-        if not DEPENDENCIES['PyQt5']:
-            print("  ⚠ SKIPPED: PyQt5 not installed")
+        if not deps()['PyQt5']:
+            _log("  ⚠ SKIPPED: PyQt5 not installed")
             return None
         
         from PyQt5 import QtWidgets
+        from PyQt5.QtCore import QPointF
+        from PyQt5.QtGui import QPixmap
         from labelme.widgets.canvas import Canvas
         from labelme.shape import Shape
         
@@ -366,21 +541,21 @@ def test_sam3_integration_with_canvas():
         
         # Set SAM3 model
         canvas.set_ai_model_name("sam3:small")
-        print(f"  ✓ Set AI model to: {canvas._ai_model_name}")
+        _log(f"  ✓ Set AI model to: {canvas._ai_model_name}")
         
         # Create test image and set it on canvas
         test_image = create_test_image()
         qimage = numpy_to_qimage(test_image)
         canvas.pixmap = QPixmap.fromImage(qimage)
-        print(f"  ✓ Set test image on canvas ({test_image.shape[1]}x{test_image.shape[0]})")
+        _log(f"  ✓ Set test image on canvas ({test_image.shape[1]}x{test_image.shape[0]})")
         
         # Test getting AI model
         model = canvas._get_ai_model()
-        print(f"  ✓ Retrieved AI model: {model.name}")
+        _log(f"  ✓ Retrieved AI model: {model.name}")
         
         # Test getting image embedding
         image_embedding = canvas._get_ai_image_embedding()
-        print(f"  ✓ Created image embedding")
+        _log(f"  ✓ Created image embedding")
         
         # Create a shape with a point in the center
         height, width = test_image.shape[:2]
@@ -391,7 +566,7 @@ def test_sam3_integration_with_canvas():
         shape.point_labels = [1]  # Foreground point
         
         # Test _update_shape_with_sam for ai_polygon
-        print("  ℹ Testing ai_polygon mode...")
+        _log("  ℹ Testing ai_polygon mode...")
         from labelme.widgets.canvas import _update_shape_with_sam
         
         shape_polygon = Shape(label="test", shape_type="polygon")
@@ -406,12 +581,12 @@ def test_sam3_integration_with_canvas():
         )
         
         if len(shape_polygon.points) > 1:
-            print(f"  ✓ ai_polygon mode works: {len(shape_polygon.points)} points created")
+            _log(f"  ✓ ai_polygon mode works: {len(shape_polygon.points)} points created")
         else:
-            print(f"  ⚠ ai_polygon mode: only {len(shape_polygon.points)} points (may be normal)")
+            _log(f"  ⚠ ai_polygon mode: only {len(shape_polygon.points)} points (may be normal)")
         
         # Test _update_shape_with_sam for ai_mask
-        print("  ℹ Testing ai_mask mode...")
+        _log("  ℹ Testing ai_mask mode...")
         shape_mask = Shape(label="test", shape_type="polygon")
         shape_mask.points = [QPointF(center_x, center_y)]
         shape_mask.point_labels = [1]
@@ -424,21 +599,21 @@ def test_sam3_integration_with_canvas():
         )
         
         if hasattr(shape_mask, 'mask') and shape_mask.mask is not None:
-            print(f"  ✓ ai_mask mode works: mask shape {shape_mask.mask.shape}")
+            _log(f"  ✓ ai_mask mode works: mask shape {shape_mask.mask.shape}")
         else:
-            print(f"  ⚠ ai_mask mode: mask not created (may be normal)")
+            _log(f"  ⚠ ai_mask mode: mask not created (may be normal)")
         
-        print("  ✓ Canvas integration test completed")
+        _log("  ✓ Canvas integration test completed")
         return True
         
     except Exception as e:
         if "not found" in str(e).lower():
-            print(f"  ⚠ Canvas integration test: SAM3 model not found in osam")
-            print(f"  ℹ This is expected if osam doesn't support SAM3 yet")
-            print(f"  ℹ The labelme code integration is correct - waiting for osam update")
+            _log(f"  ⚠ Canvas integration test: SAM3 model not found in osam")
+            _log(f"  ℹ This is expected if osam doesn't support SAM3 yet")
+            _log(f"  ℹ The labelme code integration is correct - waiting for osam update")
             return None  # Skip, not a failure
         else:
-            print(f"  ✗ Failed canvas integration test: {e}")
+            _log(f"  ✗ Failed canvas integration test: {e}")
             import traceback
             traceback.print_exc()
             return False
@@ -451,7 +626,7 @@ def main():
     print("=" * 60)
     
     # Check dependencies
-    missing_deps = [name for name, available in DEPENDENCIES.items() if not available]
+    missing_deps = [name for name, available in deps().items() if not available]
     if missing_deps:
         print(f"\n⚠ WARNING: Missing dependencies: {', '.join(missing_deps)}")
         print("  Install them with:")
@@ -467,13 +642,21 @@ def main():
     
     results = []
     
-    # Run tests
+    # Run tests; each step hands its artifact to the next instead of the
+    # later tests re-running the earlier ones
     results.append(("Model Availability", test_sam3_model_availability()))
     results.append(("Model Download", test_sam3_model_download()))
-    results.append(("Model Loading", test_sam3_model_loading()))
-    results.append(("Image Embedding", test_sam3_image_embedding()))
-    results.append(("Mask Generation", test_sam3_mask_generation()))
-    results.append(("Polygon Creation", test_sam3_polygon_creation()))
+    model = test_sam3_model_loading()
+    results.append(("Model Loading", model))
+    image_embedding = test_sam3_image_embedding(model=model)
+    results.append(("Image Embedding", image_embedding))
+    mask = test_sam3_mask_generation(model=model, image_embedding=image_embedding)
+    results.append(("Mask Generation", mask))
+    results.append((
+        "Batched Mask Generation",
+        test_sam3_mask_generation_batched(model=model, image_embedding=image_embedding),
+    ))
+    results.append(("Polygon Creation", test_sam3_polygon_creation(mask=mask)))
     results.append(("Canvas Integration", test_sam3_integration_with_canvas()))
     
     # Print summary
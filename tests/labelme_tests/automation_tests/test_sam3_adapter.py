@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from labelme._automation import sam3_adapter  # noqa: E402
+
+
+class _Tracker(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.image_encoder = torch.nn.Linear(3, 4)
+
+
+class _Predictor:
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def set_image(self, image):
+        x = torch.from_numpy(image).float().reshape(-1, 3)
+        self._features = self.tracker.image_encoder(x)
+        self._orig_hw = image.shape[:2]
+        self._is_image_set = True
+
+
+def test_compile_image_encoder_falls_back_to_eager(monkeypatch):
+    def failing_compile(module, **kwargs):
+        def compiled(*args, **kwargs):
+            raise RuntimeError("inductor backend unavailable")
+
+        return compiled
+
+    monkeypatch.setattr(torch, "compile", failing_compile)
+
+    tracker = _Tracker()
+    eager = tracker.image_encoder
+    sam3_adapter.SAM3Model._compile_image_encoder(tracker)
+    assert tracker.image_encoder is not eager
+    # Attributes of the eager encoder stay reachable through the wrapper
+    assert tracker.image_encoder.in_features == 3
+
+    image = np.random.randint(0, 256, (2, 2, 3), dtype=np.uint8)
+    predictor = _Predictor(tracker)
+    embedding = sam3_adapter.ImageEmbedding(predictor, image)
+    assert embedding.predictor._is_image_set
+
+    x = torch.from_numpy(image).float().reshape(-1, 3)
+    with torch.no_grad():
+        torch.testing.assert_close(predictor._features, eager(x))
+        # Later calls go straight to the eager encoder
+        torch.testing.assert_close(tracker.image_encoder(x), eager(x))
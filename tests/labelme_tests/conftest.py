@@ -1,9 +1,12 @@
+import copy
 import json
 import pathlib
 import shutil
 
 import pytest
 
+import labelme.config
+
 
 def _create_annotated_nested(data_path: pathlib.Path) -> None:
     dst_dir: pathlib.Path = data_path / "annotated_nested"
@@ -34,3 +37,14 @@ def data_path(tmp_path: pathlib.Path) -> pathlib.Path:
     _create_annotated_nested(data_path=data_path)
 
     return data_path
+
+
+@pytest.fixture(scope="session")
+def _default_config() -> dict:
+    return labelme.config._get_default_config_and_create_labelmerc()
+
+
+@pytest.fixture(scope="function")
+def default_config(_default_config: dict) -> dict:
+    # parse default_config.yaml once per session; each test gets its own copy
+    return copy.deepcopy(_default_config)
@@ -7,6 +7,7 @@ from typing import Literal
 import pytest
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import QPoint
+from PyQt5.QtCore import QPointF
 from PyQt5.QtCore import QSettings
 from PyQt5.QtCore import QSize
 from PyQt5.QtCore import Qt
@@ -15,7 +16,6 @@ from PyQt5.QtGui import QKeyEvent
 from pytestqt.qtbot import QtBot
 
 import labelme.app
-import labelme.config
 import labelme.testing
 
 
@@ -43,6 +43,74 @@ def _show_window_and_wait_for_imagedata(
     qtbot.waitUntil(check_imageData)  # wait for loadFile
 
 
+@pytest.fixture(scope="module")
+def _shared_window(
+    qapp: QtWidgets.QApplication, tmp_path_factory: pytest.TempPathFactory
+) -> Generator[labelme.app.MainWindow, None, None]:
+    # module-scoped, so it cannot rely on the per-test _isolated_qtsettings
+    settings_file = tmp_path_factory.mktemp("shared_window") / "qtsettings.ini"
+    settings: QSettings = QSettings(str(settings_file), QSettings.IniFormat)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            labelme.app.QtCore, "QSettings", lambda *args, **kwargs: settings
+        )
+        win: labelme.app.MainWindow = labelme.app.MainWindow()
+        yield win
+        win.close()
+
+
+@pytest.fixture
+def reused_window(
+    qtbot: QtBot, _shared_window: labelme.app.MainWindow
+) -> Generator[labelme.app.MainWindow, None, None]:
+    """MainWindow kept alive across the directory-only tests of this module."""
+    win: labelme.app.MainWindow = _shared_window
+    win.show()
+    qtbot.waitExposed(win)
+    yield win
+    # hidden and emptied between tests, so later tests that create their own
+    # window do not share the screen (and mouse/focus) with this one
+    win._nav_timer.stop()
+    win._reset_nav_prefix()
+    win.fileListWidget.clear()
+    win.resetState()
+    win.hide()
+
+
+def _open_dir_in_window(
+    qtbot: QtBot,
+    win: labelme.app.MainWindow,
+    directory: str,
+    output_dir: str | None = None,
+) -> None:
+    # same as MainWindow(filename=directory, output_dir=output_dir), which
+    # test_MainWindow_open_dir still exercises through the constructor
+    win._nav_timer.stop()
+    win._reset_nav_prefix()
+    win.output_dir = output_dir
+    win._import_images_from_dir(root_dir=directory)
+    win._open_next_image()
+
+    def check_loaded():
+        assert win.filename is not None
+        assert win.filename.startswith(directory)
+        assert win.imageData is not None
+
+    qtbot.waitUntil(check_loaded)  # wait for loadFile
+
+
+def _wait_row(qtbot: QtBot, win: labelme.app.MainWindow, row: int) -> None:
+    qtbot.waitUntil(lambda: win.fileListWidget.currentRow() == row, timeout=1000)
+
+
+def _wait_image_name(qtbot: QtBot, win: labelme.app.MainWindow, name: str) -> None:
+    qtbot.waitUntil(lambda: pathlib.Path(win.imagePath).name == name, timeout=1000)
+
+
+def _wait_nav_prefix(qtbot: QtBot, win: labelme.app.MainWindow, prefix: str) -> None:
+    qtbot.waitUntil(lambda: win._nav_number_prefix == prefix, timeout=1000)
+
+
 @pytest.mark.gui
 def test_MainWindow_open(qtbot: QtBot) -> None:
     win: labelme.app.MainWindow = labelme.app.MainWindow()
@@ -104,15 +172,12 @@ def test_MainWindow_open_dir(
     assert win.imagePath
     assert pathlib.Path(win.imagePath).name == first_image_name
     win._open_prev_image()
-    qtbot.wait(100)
-    assert pathlib.Path(win.imagePath).name == first_image_name
+    _wait_image_name(qtbot, win, first_image_name)
 
     win._open_next_image()
-    qtbot.wait(100)
-    assert pathlib.Path(win.imagePath).name == second_image_name
+    _wait_image_name(qtbot, win, second_image_name)
     win._open_prev_image()
-    qtbot.wait(100)
-    assert pathlib.Path(win.imagePath).name == first_image_name
+    _wait_image_name(qtbot, win, first_image_name)
 
     assert win.fileListWidget.count() == 3
     expected_check_state = (
@@ -126,14 +191,16 @@ def test_MainWindow_open_dir(
 
 @pytest.mark.gui
 def test_MainWindow_annotate_jpg(
-    qtbot: QtBot, data_path: pathlib.Path, tmp_path: pathlib.Path
+    qtbot: QtBot,
+    data_path: pathlib.Path,
+    tmp_path: pathlib.Path,
+    default_config: dict,
 ) -> None:
     input_file: str = str(data_path / "raw/2011_000003.jpg")
     out_file: str = str(tmp_path / "2011_000003.json")
 
-    config: dict = labelme.config._get_default_config_and_create_labelmerc()
     win: labelme.app.MainWindow = labelme.app.MainWindow(
-        config=config,
+        config=default_config,
         filename=input_file,
         output_file=out_file,
     )
@@ -142,22 +209,31 @@ def test_MainWindow_annotate_jpg(
 
     label: str = "whole"
     canvas_size: QSize = win.canvas.size()
-    points: list[tuple[float, float]] = [
-        (canvas_size.width() * 0.25, canvas_size.height() * 0.25),
-        (canvas_size.width() * 0.75, canvas_size.height() * 0.25),
-        (canvas_size.width() * 0.75, canvas_size.height() * 0.75),
-        (canvas_size.width() * 0.25, canvas_size.height() * 0.75),
+    points: list[QPoint] = [
+        QPoint(int(canvas_size.width() * 0.25), int(canvas_size.height() * 0.25)),
+        QPoint(int(canvas_size.width() * 0.75), int(canvas_size.height() * 0.25)),
+        QPoint(int(canvas_size.width() * 0.75), int(canvas_size.height() * 0.75)),
+        QPoint(int(canvas_size.width() * 0.25), int(canvas_size.height() * 0.75)),
     ]
     win._switch_canvas_mode(edit=False, createMode="polygon")
-    qtbot.wait(100)
-
-    def click(xy: tuple[float, float]) -> None:
-        qtbot.mouseMove(win.canvas, pos=QPoint(int(xy[0]), int(xy[1])))
-        qtbot.wait(100)
-        qtbot.mousePress(win.canvas, Qt.LeftButton, pos=QPoint(int(xy[0]), int(xy[1])))
-        qtbot.wait(100)
-
-    [click(xy=xy) for xy in points]
+    qtbot.waitUntil(lambda: win.canvas.drawing(), timeout=1000)
+
+    def click(pos: QPoint) -> None:
+        # the canvas takes the new vertex from the last mouse move
+        qtbot.mouseMove(win.canvas, pos=pos)
+        moved_to: QPointF = win.canvas.transformPos(QPointF(pos))
+        qtbot.waitUntil(lambda: win.canvas.prevMovePoint == moved_to, timeout=1000)
+        qtbot.mouseClick(win.canvas, Qt.LeftButton, pos=pos)
+
+    num_points: int
+    point: QPoint
+    for num_points, point in enumerate(points, start=1):
+        click(pos=point)
+        qtbot.waitUntil(
+            lambda n=num_points: win.canvas.current is not None
+            and len(win.canvas.current.points) == n,
+            timeout=500,
+        )
 
     def interact() -> None:
         qtbot.keyClicks(win.labelDialog.edit, label)
@@ -167,7 +243,7 @@ def test_MainWindow_annotate_jpg(
 
     QTimer.singleShot(300, interact)
 
-    click(xy=points[0])
+    click(pos=points[0])
 
     assert len(win.canvas.shapes) == 1
     assert len(win.canvas.shapes[0].points) == 4
@@ -210,116 +286,74 @@ def test_image_navigation_while_selecting_shape(
     win.close()
 
 
+_RAW_IMAGE_NAMES: list[str] = ["2011_000003.jpg", "2011_000006.jpg", "2011_000025.jpg"]
+
+
 @pytest.mark.gui
-def test_navigation_with_n_and_p_keys(qtbot: QtBot, data_path: pathlib.Path) -> None:
+@pytest.mark.parametrize(
+    ("start_row", "keys", "expected_row"),
+    [
+        (0, "n", 1),
+        (1, "p", 0),
+        (0, "2n", 2),
+        (2, "p", 1),
+        (1, "10n", 2),  # only 1 more image available, so stop at the last
+        (2, "100p", 0),  # only 2 previous images available, so stop at the first
+    ],
+)
+def test_navigation_with_n_and_p_keys(
+    qtbot: QtBot,
+    reused_window: labelme.app.MainWindow,
+    data_path: pathlib.Path,
+    start_row: int,
+    keys: str,
+    expected_row: int,
+) -> None:
     """Test vim-like navigation with n (next) and p (previous) keys."""
     directory: str = str(data_path / "raw")
-    win: labelme.app.MainWindow = labelme.app.MainWindow(filename=directory)
-    qtbot.addWidget(win)
-    _show_window_and_wait_for_imagedata(qtbot=qtbot, win=win)
+    win: labelme.app.MainWindow = reused_window
+    _open_dir_in_window(qtbot, win, directory=directory)
 
-    # Verify we have 3 images
+    # Verify we have 3 images and start at the first one
     assert win.fileListWidget.count() == 3
-    
-    # Get initial image name
-    initial_row = win.fileListWidget.currentRow()
-    assert initial_row == 0
-    assert win.imagePath
-    initial_image_name = pathlib.Path(win.imagePath).name
-    assert initial_image_name == "2011_000003.jpg"
-
-    # Test 1: Press 'n' to go to next image (should go to image 1)
-    qtbot.keyClick(win, Qt.Key_N)
-    qtbot.wait(100)
-    assert win.fileListWidget.currentRow() == 1
-    assert pathlib.Path(win.imagePath).name == "2011_000006.jpg"
-
-    # Test 2: Press 'p' to go to previous image (should go back to image 0)
-    qtbot.keyClick(win, Qt.Key_P)
-    qtbot.wait(100)
     assert win.fileListWidget.currentRow() == 0
-    assert pathlib.Path(win.imagePath).name == initial_image_name
-
-    # Test 3: Press '2n' to go to next 2 images
-    # First press '2'
-    key_event_2 = QKeyEvent(QKeyEvent.KeyPress, Qt.Key_2, Qt.NoModifier, "2")
-    win.keyPressEvent(key_event_2)
-    qtbot.wait(50)
-    # Then press 'n'
-    qtbot.keyClick(win, Qt.Key_N)
-    qtbot.wait(100)
-    assert win.fileListWidget.currentRow() == 2
-    assert pathlib.Path(win.imagePath).name == "2011_000025.jpg"
-
-    # Test 4: Press 'p' to go back one (should go to image 1)
-    qtbot.keyClick(win, Qt.Key_P)
-    qtbot.wait(100)
-    assert win.fileListWidget.currentRow() == 1
-    assert pathlib.Path(win.imagePath).name == "2011_000006.jpg"
-
-    # Test 5: Press '10n' - should go to next 10, but only 1 more available (to image 2)
-    # Press '1'
-    key_event_1 = QKeyEvent(QKeyEvent.KeyPress, Qt.Key_1, Qt.NoModifier, "1")
-    win.keyPressEvent(key_event_1)
-    qtbot.wait(50)
-    # Press '0'
-    key_event_0 = QKeyEvent(QKeyEvent.KeyPress, Qt.Key_0, Qt.NoModifier, "0")
-    win.keyPressEvent(key_event_0)
-    qtbot.wait(50)
-    # Press 'n'
-    qtbot.keyClick(win, Qt.Key_N)
-    qtbot.wait(100)
-    # Should be at last image (row 2)
-    assert win.fileListWidget.currentRow() == 2
-    assert pathlib.Path(win.imagePath).name == "2011_000025.jpg"
-
-    # Test 6: Press '100p' - should go back 100, but only 2 available (to image 0)
-    # Press '1'
-    win.keyPressEvent(key_event_1)
-    qtbot.wait(50)
-    # Press '0'
-    win.keyPressEvent(key_event_0)
-    qtbot.wait(50)
-    # Press '0' again
-    win.keyPressEvent(key_event_0)
-    qtbot.wait(50)
-    # Press 'p'
-    qtbot.keyClick(win, Qt.Key_P)
-    qtbot.wait(100)
-    # Should be at first image (row 0)
-    assert win.fileListWidget.currentRow() == 0
-    assert pathlib.Path(win.imagePath).name == initial_image_name
-
-    # Test 7: Press 'n' at first image - should go to next
-    qtbot.keyClick(win, Qt.Key_N)
-    qtbot.wait(100)
-    assert win.fileListWidget.currentRow() == 1
-
-    # Test 8: Press 'p' at middle image - should go to previous
-    qtbot.keyClick(win, Qt.Key_P)
-    qtbot.wait(100)
-    assert win.fileListWidget.currentRow() == 0
-
-    win.close()
+    assert pathlib.Path(win.imagePath).name == _RAW_IMAGE_NAMES[0]
+
+    win.fileListWidget.setCurrentRow(start_row)
+    _wait_image_name(qtbot, win, _RAW_IMAGE_NAMES[start_row])
+
+    # Type the number prefix digit by digit, then 'n' or 'p'
+    *digits, direction = keys
+    prefix: str = ""
+    for digit in digits:
+        prefix += digit
+        key_event = QKeyEvent(
+            QKeyEvent.KeyPress, Qt.Key_0 + int(digit), Qt.NoModifier, digit
+        )
+        win.keyPressEvent(key_event)
+        _wait_nav_prefix(qtbot, win, prefix)
+    qtbot.keyClick(win, Qt.Key_N if direction == "n" else Qt.Key_P)
+
+    _wait_row(qtbot, win, expected_row)
+    assert pathlib.Path(win.imagePath).name == _RAW_IMAGE_NAMES[expected_row]
+    assert win._nav_number_prefix == ""
 
 
 @pytest.mark.gui
-def test_navigation_number_prefix_timeout(qtbot: QtBot, data_path: pathlib.Path) -> None:
+def test_navigation_number_prefix_timeout(
+    qtbot: QtBot, reused_window: labelme.app.MainWindow, data_path: pathlib.Path
+) -> None:
     """Test that number prefix times out after 1 second."""
     directory: str = str(data_path / "raw")
-    win: labelme.app.MainWindow = labelme.app.MainWindow(filename=directory)
-    qtbot.addWidget(win)
-    _show_window_and_wait_for_imagedata(qtbot=qtbot, win=win)
+    win: labelme.app.MainWindow = reused_window
+    _open_dir_in_window(qtbot, win, directory=directory)
 
     # Press '1' to start building prefix
     key_event_1 = QKeyEvent(QKeyEvent.KeyPress, Qt.Key_1, Qt.NoModifier, "1")
     win.keyPressEvent(key_event_1)
-    qtbot.wait(50)
-    assert win._nav_number_prefix == "1"
+    _wait_nav_prefix(qtbot, win, "1")
 
     # Wait for timeout (1 second + small buffer)
     qtbot.wait(1100)
     # Prefix should be cleared
     assert win._nav_number_prefix == ""
-
-    win.close()
@@ -0,0 +1,23 @@
+import pytest
+
+from labelme.widgets import UniqueLabelQListWidget
+
+
+@pytest.mark.gui
+def test_UniqueLabelQListWidget(qtbot):
+    widget = UniqueLabelQListWidget()
+    qtbot.addWidget(widget)
+
+    widget.add_label_item(label="person", color=(255, 0, 0))
+    widget.add_label_item(label="dog", color=(0, 0, 255))
+    assert widget.find_label_item("dog") is widget.item(1)
+    with pytest.raises(ValueError):
+        widget.add_label_item(label="dog", color=(0, 0, 255))
+
+    widget.takeItem(0)
+    assert widget.find_label_item("person") is None
+    widget.refresh_label_numbers()
+    assert widget.item(0).text() == "1. dog <font color='#0000ff'>●</font>"
+
+    widget.clear()
+    assert widget.find_label_item("dog") is None
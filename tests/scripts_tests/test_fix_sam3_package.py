@@ -0,0 +1,116 @@
+import errno
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+from .util import load_script
+
+fix_sam3_package = load_script("fix_sam3_package")
+
+
+def _make_tree(root: pathlib.Path) -> None:
+    (root / "pkg" / "sub").mkdir(parents=True)
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "pkg" / "sub" / "data.bin").write_bytes(bytes(range(256)) * 64)
+    (root / "pkg" / "link.py").symlink_to("__init__.py")
+    (root / "pkg" / "sub_link").symlink_to("sub", target_is_directory=True)
+
+
+def test_fast_copytree_falls_back_to_scandir_copytree(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    _make_tree(src)
+    # neither robocopy nor cp available
+    monkeypatch.setattr(shutil, "which", lambda cmd: None)
+
+    fix_sam3_package._fast_copytree(str(src), str(dst))
+
+    assert (dst / "pkg" / "__init__.py").read_text() == ""
+    assert (dst / "pkg" / "sub" / "data.bin").read_bytes() == (
+        src / "pkg" / "sub" / "data.bin"
+    ).read_bytes()
+    assert (dst / "pkg" / "link.py").is_symlink()
+    assert os.readlink(dst / "pkg" / "link.py") == "__init__.py"
+    assert (dst / "pkg" / "sub_link").is_symlink()
+    assert os.readlink(dst / "pkg" / "sub_link") == "sub"
+    assert (dst / "pkg" / "sub" / "data.bin").stat().st_mtime == (
+        src / "pkg" / "sub" / "data.bin"
+    ).stat().st_mtime
+
+
+def test_scandir_copytree_into_existing_tree(tmp_path: pathlib.Path) -> None:
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    _make_tree(src)
+    _make_tree(dst)
+    (dst / "pkg" / "extra.txt").write_text("kept")
+
+    fix_sam3_package._scandir_copytree(str(src), str(dst))
+
+    assert (dst / "pkg" / "extra.txt").read_text() == "kept"
+    assert os.readlink(dst / "pkg" / "link.py") == "__init__.py"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="uses sendfile")
+def test_copyfile_uses_sendfile(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src = tmp_path / "src.bin"
+    dst = tmp_path / "dst.bin"
+    src.write_bytes(os.urandom(1 << 20))
+
+    calls = []
+    sendfile = os.sendfile
+
+    def spy_sendfile(*args):
+        calls.append(args)
+        return sendfile(*args)
+
+    monkeypatch.setattr(os, "sendfile", spy_sendfile)
+    # the Python copy must not be needed
+    monkeypatch.setattr(shutil, "copyfile", lambda *args: pytest.fail("copyfile"))
+
+    fix_sam3_package._copyfile(str(src), str(dst))
+
+    assert calls
+    assert dst.read_bytes() == src.read_bytes()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="uses sendfile")
+def test_copyfile_falls_back_when_sendfile_fails(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src = tmp_path / "src.bin"
+    dst = tmp_path / "dst.bin"
+    src.write_bytes(os.urandom(1 << 20))
+
+    def failing_sendfile(*args):
+        raise OSError(errno.EINVAL, "sendfile not supported")
+
+    monkeypatch.setattr(os, "sendfile", failing_sendfile)
+    copied = []
+    copyfile = shutil.copyfile
+    monkeypatch.setattr(
+        shutil, "copyfile", lambda *args: copied.append(args) or copyfile(*args)
+    )
+
+    fix_sam3_package._copyfile(str(src), str(dst))
+
+    assert copied == [(str(src), str(dst))]
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_copyfile_empty_file(tmp_path: pathlib.Path) -> None:
+    src = tmp_path / "src.bin"
+    dst = tmp_path / "dst.bin"
+    src.write_bytes(b"")
+    dst.write_bytes(b"stale")
+
+    fix_sam3_package._copyfile(str(src), str(dst))
+
+    assert dst.read_bytes() == b""
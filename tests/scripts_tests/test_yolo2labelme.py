@@ -0,0 +1,88 @@
+import io
+import pathlib
+import struct
+
+import PIL.Image
+import pytest
+
+from .util import load_script
+
+yolo2labelme = load_script("yolo2labelme")
+
+
+def _encode(fmt: str, size: tuple[int, int] = (37, 21), **kwargs) -> bytes:
+    buf = io.BytesIO()
+    PIL.Image.new("RGB", size, (10, 20, 30)).save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+
+def _bmp_core_header(width: int, height: int) -> bytes:
+    # BITMAPCOREHEADER (OS/2 1.x) with 24-bit pixels
+    row_size = (width * 3 + 3) & ~3
+    pixels = b"\0" * (row_size * height)
+    offset = 14 + 12
+    file_header = struct.pack("<2sIHHI", b"BM", offset + len(pixels), 0, 0, offset)
+    core_header = struct.pack("<IHHHH", 12, width, height, 1, 24)
+    return file_header + core_header + pixels
+
+
+def _bmp_top_down(width: int, height: int) -> bytes:
+    data = bytearray(_encode("BMP", (width, height)))
+    struct.pack_into("<i", data, 22, -height)
+    return bytes(data)
+
+
+def _jpeg_with_exif(size: tuple[int, int]) -> bytes:
+    exif = PIL.Image.Exif()
+    exif[0x010E] = "x" * 4096  # ImageDescription, pushes SOF further out
+    return _encode("JPEG", size, exif=exif.tobytes())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param(_encode("PNG"), id="png"),
+        pytest.param(_encode("JPEG"), id="jpeg-baseline"),
+        pytest.param(_encode("JPEG", progressive=True), id="jpeg-progressive"),
+        pytest.param(_jpeg_with_exif((640, 480)), id="jpeg-exif"),
+        pytest.param(_encode("BMP"), id="bmp-info-header"),
+        pytest.param(_bmp_core_header(37, 21), id="bmp-core-header"),
+        pytest.param(_bmp_top_down(37, 21), id="bmp-top-down"),
+    ],
+)
+def test_read_image_size_matches_pil(data: bytes) -> None:
+    with PIL.Image.open(io.BytesIO(data)) as img:
+        expected = img.size
+
+    assert tuple(yolo2labelme._read_image_size(data)) == expected
+    probe = data[: yolo2labelme._HEADER_PROBE_BYTES]
+    assert tuple(yolo2labelme._read_image_size(probe)) == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param(_encode("PNG")[:20], id="png"),
+        pytest.param(_encode("PNG")[:8], id="png-signature-only"),
+        pytest.param(_encode("JPEG")[:100], id="jpeg-before-sof"),
+        pytest.param(_jpeg_with_exif((64, 48))[:2000], id="jpeg-in-exif"),
+        pytest.param(b"\xff\xd8\xff\xc0\x00\x11\x08", id="jpeg-in-sof"),
+        pytest.param(b"\xff\xd8\xff\xe0\x00\x00", id="jpeg-bad-length"),
+        pytest.param(_encode("BMP")[:24], id="bmp"),
+        pytest.param(_bmp_core_header(37, 21)[:20], id="bmp-core-header"),
+        pytest.param(b"GIF89a", id="unsupported"),
+    ],
+)
+def test_read_image_size_truncated(data: bytes) -> None:
+    assert yolo2labelme._read_image_size(data) is None
+
+
+def test_image_size_falls_back_to_pil(tmp_path: pathlib.Path) -> None:
+    image_file = tmp_path / "image.tif"
+    image_file.write_bytes(_encode("TIFF", (33, 44)))
+
+    assert yolo2labelme._read_image_size(image_file.read_bytes()) is None
+    assert yolo2labelme._image_size(str(image_file), image_file.read_bytes()) == (
+        33,
+        44,
+    )
@@ -0,0 +1,21 @@
+import importlib.util
+import os.path as osp
+import sys
+import types
+
+here = osp.dirname(osp.abspath(__file__))
+root_dir = osp.join(here, "../..")
+
+
+def load_script(name: str) -> types.ModuleType:
+    """Import one of the top-level scripts (e.g. ``yolo2labelme``) by path."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, osp.join(root_dir, f"{name}.py")
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -11,20 +11,41 @@ Example:
 
 import argparse
 import base64
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import itertools
 import json
 import os
 import os.path as osp
+import struct
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-import yaml
-from PIL import Image
+import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def load_yolo_classes(yaml_file: str) -> Dict[int, str]:
-    """Load class names from YOLO YAML file."""
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+
+@functools.lru_cache(maxsize=8)
+def _load_yolo_classes(yaml_file: str, mtime_ns: int) -> Dict[int, str]:
+    """Parse class names from a YOLO YAML file; cached per path and mtime."""
+    # Imported here so runs without a YAML file do not pay for it
+    import yaml
+    
+    # libyaml's C loader when PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
     with open(yaml_file, 'r') as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=loader)
     
     classes = {}
     if 'names' in data:
@@ -32,6 +53,53 @@ def load_yolo_classes(yaml_file: str) -> Dict[int, str]:
     return classes
 
 
+def load_yolo_classes(yaml_file: str) -> Dict[int, str]:
+    """
+    Load class names from YOLO YAML file.
+    
+    Converting several splits in one process parses the file only once; it is
+    re-read when its modification time changes.
+    """
+    mtime_ns = os.stat(yaml_file).st_mtime_ns
+    return dict(_load_yolo_classes(yaml_file, mtime_ns))
+
+
+def _parse_yolo_line(yolo_line: str) -> Optional[Tuple[int, float, float, float, float]]:
+    """
+    Parse a YOLO label line into (class_id, center_x, center_y, width, height).
+    
+    Returns None for lines with fewer than 5 fields; extra fields are ignored.
+    """
+    parts = yolo_line.split()
+    if len(parts) < 5:
+        return None
+    center_x, center_y, width, height = map(float, parts[1:5])
+    return int(parts[0]), center_x, center_y, width, height
+
+
+def _bbox_corners(
+    center_x: float,
+    center_y: float,
+    width: float,
+    height: float,
+    img_width: int,
+    img_height: int,
+) -> Tuple[float, float, float, float]:
+    """Convert a normalized center/size box to pixel corners clipped to the image."""
+    # Convert normalized coordinates to absolute pixel coordinates
+    x_center = center_x * img_width
+    y_center = center_y * img_height
+    half_width = width * img_width / 2
+    half_height = height * img_height / 2
+    
+    # Calculate rectangle corners, within image bounds
+    x1 = max(0, min(x_center - half_width, img_width))
+    y1 = max(0, min(y_center - half_height, img_height))
+    x2 = max(0, min(x_center + half_width, img_width))
+    y2 = max(0, min(y_center + half_height, img_height))
+    return x1, y1, x2, y2
+
+
 def yolo_to_labelme_bbox(
     yolo_line: str, img_width: int, img_height: int
 ) -> Tuple[float, float, float, float]:
@@ -42,49 +110,302 @@ def yolo_to_labelme_bbox(
     YOLO format: class_id center_x center_y width height (all normalized 0-1)
     Labelme format: [[x1, y1], [x2, y2]] (absolute pixel coordinates)
     """
-    parts = yolo_line.strip().split()
-    if len(parts) < 5:
+    parsed = _parse_yolo_line(yolo_line)
+    if parsed is None:
         return None
     
-    class_id = int(parts[0])
-    center_x = float(parts[1])
-    center_y = float(parts[2])
-    width = float(parts[3])
-    height = float(parts[4])
+    class_id, center_x, center_y, width, height = parsed
+    return _bbox_corners(center_x, center_y, width, height, img_width, img_height), class_id
+
+
+def yolo_to_labelme_bboxes(
+    rows: np.ndarray, img_width: int, img_height: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized ``yolo_to_labelme_bbox`` over all boxes of one label file.
+    
+    Args:
+        rows: (N, 5) array of class_id, center_x, center_y, width, height
+            (normalized 0-1)
     
-    # Convert normalized coordinates to absolute pixel coordinates
-    x_center = center_x * img_width
-    y_center = center_y * img_height
-    bbox_width = width * img_width
-    bbox_height = height * img_height
+    Returns:
+        (class_ids, corners): (N,) int array and (N, 4) array of
+        x1, y1, x2, y2 absolute pixel coordinates clipped to the image
+    """
+    class_ids = rows[:, 0].astype(np.int64)
+    scale = np.array([img_width, img_height], dtype=np.float64)
+    centers = rows[:, 1:3] * scale
+    half_sizes = rows[:, 3:5] * scale / 2
+    corners = np.hstack([centers - half_sizes, centers + half_sizes])
+    np.clip(corners, 0, np.tile(scale, 2), out=corners)
+    return class_ids, corners
+
+
+# Bytes read from the start of an image when probing its size; enough to
+# reach the JPEG frame header past typical EXIF/ICC segments
+_HEADER_PROBE_BYTES = 1 << 16
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _read_image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from the header bytes of a PNG, JPEG or BMP image.
+    
+    Returns None for other formats, or when the size is not within ``data``.
+    """
+    if data.startswith(_PNG_SIGNATURE):
+        # signature, IHDR length and type, then 4-byte width and height
+        if len(data) < 24 or data[12:16] != b'IHDR':
+            return None
+        return struct.unpack_from('>II', data, 16)
+    
+    if data.startswith(b'BM'):
+        # BITMAPCOREHEADER (12 bytes) stores 16-bit sizes, later headers
+        # 32-bit ones; a negative height means a top-down bitmap
+        if len(data) < 22:
+            return None
+        (dib_size,) = struct.unpack_from('<I', data, 14)
+        if dib_size == 12:
+            return struct.unpack_from('<HH', data, 18)
+        if len(data) < 26:
+            return None
+        width, height = struct.unpack_from('<ii', data, 18)
+        return width, abs(height)
     
-    # Calculate rectangle corners
-    x1 = x_center - bbox_width / 2
-    y1 = y_center - bbox_height / 2
-    x2 = x_center + bbox_width / 2
-    y2 = y_center + bbox_height / 2
+    if data.startswith(b'\xff\xd8'):
+        offset = 2
+        while offset + 4 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:  # fill byte
+                offset += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # no length field
+                offset += 2
+                continue
+            # marker, 2-byte length (counting itself), then the payload
+            (segment_length,) = struct.unpack_from('>H', data, offset + 2)
+            if segment_length < 2:
+                return None
+            if marker in _JPEG_SOF_MARKERS:
+                # precision byte, then 2-byte height and width
+                if segment_length < 7 or offset + 9 > len(data):
+                    return None
+                height, width = struct.unpack_from('>HH', data, offset + 5)
+                return width, height
+            offset += 2 + segment_length
     
-    # Ensure coordinates are within image bounds
-    x1 = max(0, min(x1, img_width))
-    y1 = max(0, min(y1, img_height))
-    x2 = max(0, min(x2, img_width))
-    y2 = max(0, min(y2, img_height))
+    return None
+
+
+def _image_size(image_path: str, data: bytes) -> Tuple[int, int]:
+    """
+    Get (width, height) of an image from its leading bytes ``data``.
+    
+    Falls back to PIL for formats the header reader does not handle.
+    """
+    size = _read_image_size(data)
+    if size is not None:
+        return size
+    # Only needed for formats such as TIFF, so imported on first use
+    from PIL import Image
     
-    return (x1, y1, x2, y2), class_id
+    with Image.open(image_path) as img:
+        return img.size
 
 
-def image_to_base64(image_path: str) -> str:
-    """Convert image to base64 string."""
+def _read_image_bytes(image_path: str, include_image_data: bool) -> bytes:
+    """Read the whole image when it will be embedded, else only its header."""
     with open(image_path, 'rb') as f:
-        return base64.b64encode(f.read()).decode('utf-8')
+        return f.read() if include_image_data else f.read(_HEADER_PROBE_BYTES)
+
+
+def _prefetch_image_bytes(
+    image_files: Iterable[str], include_image_data: bool, window: int = 8
+) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    Yield (image_file, data) in order while later files are read on threads.
+    
+    Up to ``window`` reads are in flight at once, which bounds the memory held
+    by prefetched images. ``data`` is None when the read failed, leaving the
+    consumer to read the file again and report the error.
+    """
+    files = iter(image_files)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ex:
+        pending = collections.deque(
+            (image_file, ex.submit(_read_image_bytes, image_file, include_image_data))
+            for image_file in itertools.islice(files, window)
+        )
+        while pending:
+            image_file, future = pending.popleft()
+            for next_file in itertools.islice(files, 1):
+                pending.append((
+                    next_file,
+                    ex.submit(_read_image_bytes, next_file, include_image_data),
+                ))
+            try:
+                data = future.result()
+            except OSError:
+                data = None
+            yield image_file, data
+
+
+# Label for each class id in this process, filled from the YAML classes by
+# _init_label_lut and extended with class_<id> names for unknown ids
+_LABEL_LUT: Dict[int, str] = {}
+
+
+def _init_label_lut(classes: Dict[int, str]) -> None:
+    """Load ``classes`` into this process's label table (pool initializer)."""
+    _LABEL_LUT.clear()
+    _LABEL_LUT.update(classes)
+
+
+def _label_for(class_id: int) -> str:
+    """Get the label for ``class_id``, formatting a fallback name only once."""
+    label = _LABEL_LUT.get(class_id)
+    if label is None:
+        label = _LABEL_LUT.setdefault(class_id, f"class_{class_id}")
+    return label
+
+
+# Fields shared by every converted rectangle; copied per box and filled in
+_SHAPE_TEMPLATE = {
+    "label": None,
+    "points": None,
+    "group_id": None,
+    "description": "",
+    "shape_type": "rectangle",
+    "flags": None,
+}
+
+
+def _write_json(data: dict, json_file: Path, pretty: bool = False) -> None:
+    """
+    Write ``data`` as JSON, using orjson's C encoder when installed.
+    
+    The output is compact unless ``pretty`` asks for 2-space indentation.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else None
+        json_file.write_bytes(orjson.dumps(data, option=option))
+    else:
+        with open(json_file, 'w') as f:
+            if pretty:
+                json.dump(data, f, indent=2)
+            else:
+                json.dump(data, f, separators=(',', ':'))
+
+
+def _dumps_line(data: dict) -> bytes:
+    """Encode ``data`` as one compact JSON Lines record (without the newline)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def _process_one(
+    image_file: str,
+    labels_dir: Path,
+    output_dir: Path,
+    include_image_data: bool,
+    image_path_prefix: str = '',
+    jsonl: bool = False,
+    pretty: bool = False,
+    data: Optional[bytes] = None,
+) -> Tuple[bool, Optional[str], Optional[bytes]]:
+    """
+    Convert one image and its YOLO label file to a Labelme JSON file.
+    
+    Kept at module level so it can be pickled into worker processes. Labels
+    come from the table set up by ``_init_label_lut``. ``image_path_prefix``
+    is the images directory relative to ``output_dir`` (with a trailing
+    separator, or empty) that is prepended to the image name when the image is
+    not embedded. ``data`` takes the
+    image bytes when they were already read, as returned by
+    ``_read_image_bytes``.
+    
+    Returns:
+        (converted, message, record): whether the image was converted, the
+        warning to report when it was skipped, and with ``jsonl`` the encoded
+        record for the caller to append instead of writing a JSON file
+    """
+    image_name = osp.basename(image_file)
+    stem = osp.splitext(image_name)[0]
+    
+    # Find corresponding label file
+    label_file = labels_dir / (stem + '.txt')
+    
+    if not label_file.exists():
+        return False, f"Warning: No label file found for {image_name}, skipping...", None
+    
+    # Read image dimensions; when embedding the image, read the file once and
+    # take both the size and the base64 data from the same bytes
+    image_data = None
+    try:
+        if data is None:
+            data = _read_image_bytes(image_file, include_image_data)
+        img_width, img_height = _image_size(image_file, data)
+        if include_image_data:
+            image_data = base64.b64encode(data).decode('ascii')
+    except Exception as e:
+        return False, f"Error loading image {image_name}: {e}, skipping...", None
+    
+    # Read YOLO labels; lines with fewer than 5 fields are ignored and extra
+    # fields are dropped, so the rows can be converted in one vectorized pass.
+    # The file is read and split as bytes, which NumPy parses without
+    # decoding each line to str first
+    with open(label_file, 'rb') as f:
+        lines = f.read().splitlines()
+    rows = [parts[:5] for parts in map(bytes.split, lines) if len(parts) >= 5]
+    class_ids, corners = yolo_to_labelme_bboxes(
+        np.array(rows, dtype=np.float64).reshape(-1, 5), img_width, img_height
+    )
+    
+    shapes = []
+    for class_id, (x1, y1, x2, y2) in zip(class_ids.tolist(), corners.tolist()):
+        # Create rectangle shape for labelme
+        shape = _SHAPE_TEMPLATE.copy()
+        shape["label"] = _label_for(class_id)
+        shape["points"] = [[x1, y1], [x2, y2]]
+        shape["flags"] = {}  # mutable, so never shared between shapes
+        shapes.append(shape)
+    
+    # Create labelme JSON structure
+    labelme_data = {
+        "version": "5.0.1",
+        "flags": {},
+        "shapes": shapes,
+        "imagePath": image_name if include_image_data else image_path_prefix + image_name,
+        "imageData": image_data,
+        "imageHeight": img_height,
+        "imageWidth": img_width
+    }
+    
+    if jsonl:
+        return True, None, _dumps_line(labelme_data)
+    
+    # Save JSON file
+    json_file = output_dir / (stem + '.json')
+    _write_json(labelme_data, json_file, pretty=pretty)
+    
+    return True, None, None
 
 
 def convert_yolo_to_labelme(
     yolo_dir: str,
     output_dir: str,
     yaml_file: str = None,
-    include_image_data: bool = True,
-    split: str = 'train'
+    include_image_data: bool = False,
+    split: str = 'train',
+    jsonl: bool = False,
+    pretty: bool = False,
+    workers: Optional[int] = None,
 ):
     """
     Convert YOLO format dataset to Labelme JSON format.
@@ -93,8 +414,17 @@ def convert_yolo_to_labelme(
         yolo_dir: Root directory of YOLO dataset (contains images/ and labels/)
         output_dir: Output directory for labelme JSON files
         yaml_file: Path to YOLO YAML file (for class names)
-        include_image_data: Whether to include image data in JSON (default: True)
+        include_image_data: Whether to embed the image as base64 in each JSON
+            file (default: False, the JSON refers to the image by a path
+            relative to output_dir)
         split: Dataset split to convert ('train', 'val', or 'test')
+        jsonl: Write all annotations as compact records to a single
+            output_dir/labels.jsonl instead of one JSON file per image
+        pretty: Indent the per-image JSON files for reading by hand (default:
+            compact; JSON Lines records are always compact)
+        workers: Number of worker processes (default: one per CPU); with 1,
+            images are converted in this process while the next ones are
+            read ahead on threads
     """
     yolo_dir = Path(yolo_dir)
     output_dir = Path(output_dir)
@@ -121,96 +451,101 @@ def convert_yolo_to_labelme(
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Get all image files
+    # Get all image files; scandir's entries carry the file type from the
+    # directory listing, and workers get plain path strings
     image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'}
-    image_files = [
-        f for f in images_dir.iterdir()
-        if f.suffix.lower() in image_extensions
-    ]
+    with os.scandir(images_dir) as it:
+        image_files = [
+            entry.path for entry in it
+            if osp.splitext(entry.name)[1].lower() in image_extensions
+            and entry.is_file()
+        ]
     
     print(f"\nFound {len(image_files)} images in {images_dir}")
     print(f"Converting to Labelme format in {output_dir}...")
     
+    # Create labels.txt file for labelme; it only depends on the classes
+    labels_file = output_dir / 'labels.txt'
+    if classes:
+        with open(labels_file, 'w') as f:
+            for class_id in sorted(classes.keys()):
+                f.write(f"{classes[class_id]}\n")
+    
     converted = 0
     skipped = 0
+    messages = []
     
-    for image_file in image_files:
-        # Find corresponding label file
-        label_file = labels_dir / (image_file.stem + '.txt')
-        
-        if not label_file.exists():
-            print(f"Warning: No label file found for {image_file.name}, skipping...")
-            skipped += 1
-            continue
-        
-        # Load image to get dimensions
-        try:
-            img = Image.open(image_file)
-            img_width, img_height = img.size
-        except Exception as e:
-            print(f"Error loading image {image_file.name}: {e}, skipping...")
-            skipped += 1
-            continue
-        
-        # Read YOLO labels
-        shapes = []
-        with open(label_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                result = yolo_to_labelme_bbox(line, img_width, img_height)
-                if result is None:
-                    continue
-                
-                (x1, y1, x2, y2), class_id = result
-                
-                # Get class name
-                label = classes.get(class_id, f"class_{class_id}")
-                
-                # Create rectangle shape for labelme
-                shape = {
-                    "label": label,
-                    "points": [[x1, y1], [x2, y2]],
-                    "group_id": None,
-                    "description": "",
-                    "shape_type": "rectangle",
-                    "flags": {}
-                }
-                shapes.append(shape)
-        
-        # Create labelme JSON structure
-        labelme_data = {
-            "version": "5.0.1",
-            "flags": {},
-            "shapes": shapes,
-            "imagePath": osp.relpath(image_file, output_dir) if not include_image_data else osp.basename(image_file),
-            "imageData": image_to_base64(image_file) if include_image_data else None,
-            "imageHeight": img_height,
-            "imageWidth": img_width
-        }
-        
-        # Save JSON file
-        json_file = output_dir / (image_file.stem + '.json')
-        with open(json_file, 'w') as f:
-            json.dump(labelme_data, f, indent=2)
-        
-        converted += 1
-        if converted % 100 == 0:
-            print(f"Converted {converted} files...")
+    # Each image is independent, so convert them in parallel; the shared
+    # arguments are bound once and chunksize amortizes the IPC per task
+    workers = workers or os.cpu_count() or 1
+    # Every image sits directly in images_dir, so its path relative to the
+    # output directory is one shared prefix plus the file name
+    image_path_prefix = osp.relpath(images_dir, output_dir)
+    image_path_prefix = (
+        '' if image_path_prefix == os.curdir else image_path_prefix + os.sep
+    )
+    worker = functools.partial(
+        _process_one,
+        labels_dir=labels_dir,
+        output_dir=output_dir,
+        include_image_data=include_image_data,
+        image_path_prefix=image_path_prefix,
+        jsonl=jsonl,
+        pretty=pretty,
+    )
+    jsonl_file = output_dir / 'labels.jsonl'
+    with contextlib.ExitStack() as stack:
+        # In JSON Lines mode workers return the encoded records and only this
+        # process writes, through one large buffer on a single file
+        if jsonl:
+            out = stack.enter_context(open(jsonl_file, 'wb', buffering=1 << 20))
+        # The label table is set up once per process rather than shipped
+        # with every chunk of tasks
+        if workers == 1:
+            _init_label_lut(classes)
+            results = (
+                worker(image_file, data=data)
+                for image_file, data in _prefetch_image_bytes(
+                    image_files, include_image_data
+                )
+            )
+        else:
+            ex = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_label_lut,
+                    initargs=(classes,),
+                )
+            )
+            results = ex.map(worker, image_files, chunksize=16)
+        # Skip messages are collected and reported after the loop so they do
+        # not interleave with the progress output
+        if tqdm is not None:
+            results = tqdm(results, total=len(image_files), desc="Converting")
+        for ok, message, record in results:
+            if not ok:
+                messages.append(message)
+                skipped += 1
+                continue
+            
+            if record is not None:
+                out.write(record)
+                out.write(b'\n')
+            converted += 1
+            if tqdm is None and converted % 100 == 0:
+                print(f"Converted {converted} files...")
+    
+    if messages:
+        print("\n".join(messages))
     
     print(f"\n✓ Conversion complete!")
     print(f"  Converted: {converted} files")
     print(f"  Skipped: {skipped} files")
     print(f"  Output directory: {output_dir}")
+    if jsonl:
+        print(f"  JSON Lines file: {jsonl_file}")
     
-    # Create labels.txt file for labelme
     if classes:
-        labels_file = output_dir / 'labels.txt'
-        with open(labels_file, 'w') as f:
-            for class_id in sorted(classes.keys()):
-                f.write(f"{classes[class_id]}\n")
         print(f"  Labels file: {labels_file}")
 
 
@@ -223,11 +558,14 @@ Examples:
   # Convert train split
   python yolo2labelme.py /path/to/yolo/dataset output_dir --yaml dataset.yaml
   
-  # Convert without embedding image data
-  python yolo2labelme.py /path/to/yolo/dataset output_dir --yaml dataset.yaml --no-image-data
+  # Convert and embed the image data in each JSON file
+  python yolo2labelme.py /path/to/yolo/dataset output_dir --yaml dataset.yaml --embed-image-data
   
   # Convert validation split
   python yolo2labelme.py /path/to/yolo/dataset output_dir --yaml dataset.yaml --split val
+  
+  # Write all annotations to a single output_dir/labels.jsonl
+  python yolo2labelme.py /path/to/yolo/dataset output_dir --yaml dataset.yaml --jsonl
         """
     )
     parser.add_argument(
@@ -246,10 +584,21 @@ Examples:
         default=None,
         help='Path to YOLO YAML file (for class names)'
     )
+    parser.add_argument(
+        '--embed-image-data',
+        action='store_true',
+        help=(
+            'Embed base64 image data in JSON files '
+            '(default: refer to images by relative path)'
+        )
+    )
     parser.add_argument(
         '--no-image-data',
         action='store_true',
-        help='Do not include image data in JSON files (use relative paths instead)'
+        help=(
+            'Do not include image data in JSON files '
+            '(the default; kept for compatibility)'
+        )
     )
     parser.add_argument(
         '--split',
@@ -258,6 +607,25 @@ Examples:
         choices=['train', 'val', 'test'],
         help='Dataset split to convert (default: train)'
     )
+    parser.add_argument(
+        '--jsonl',
+        action='store_true',
+        help=(
+            'Write one compact JSON record per line to labels.jsonl '
+            'instead of one JSON file per image'
+        )
+    )
+    parser.add_argument(
+        '--pretty',
+        action='store_true',
+        help='Indent the JSON files for readability (default: compact)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: one per CPU; 1 converts in-process)'
+    )
     
     args = parser.parse_args()
     
@@ -275,8 +643,11 @@ Examples:
         yolo_dir=args.yolo_dir,
         output_dir=args.output_dir,
         yaml_file=yaml_file,
-        include_image_data=not args.no_image_data,
-        split=args.split
+        include_image_data=args.embed_image_data and not args.no_image_data,
+        split=args.split,
+        jsonl=args.jsonl,
+        pretty=args.pretty,
+        workers=args.workers,
     )
 
 